@@ -9,6 +9,16 @@ class Settings:
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
     JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES",60))
 
+    # Caché LRU + TTL de usuarios autenticados (evita el SELECT por petición)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+
+    # bcrypt: coste (log2 de iteraciones) y pool de hilos donde se calcula.
+    # Si cambia el coste, los hashes antiguos se recalculan en el siguiente login
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+
     # Preferir siempre NON_POOLING para serverless
     raw_dsn = (
         os.getenv("DATABASE_URL")
@@ -32,6 +42,143 @@ class Settings:
         raw_dsn = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(q), parts.fragment))
 
     DATABASE_URL = raw_dsn
+
+    # Modo de pool de conexiones:
+    #   "serverless" -> NullPool, una conexión nueva por petición (Vercel, lambdas)
+    #   "queue"      -> QueuePool persistente para servidores de larga duración (Railway)
+    #   "pgbouncer"  -> NullPool sin prepared statements, para un pooler externo
+    DB_POOL_MODE = os.getenv("DB_POOL_MODE", "serverless").lower()
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # segundos
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))    # segundos
+
+    # Los handlers síncronos (def) corren en el threadpool de AnyIO para no
+    # bloquear el event loop con las consultas: este es su tamaño máximo.
+    # Con pool "queue" no debe superar DB_POOL_SIZE + DB_MAX_OVERFLOW (los
+    # hilos de más solo esperarían conexión hasta DB_POOL_TIMEOUT): por
+    # defecto se iguala a esa capacidad y al arrancar se recorta si la supera
+    DB_THREADPOOL_SIZE = int(os.getenv(
+        "DB_THREADPOOL_SIZE",
+        DB_POOL_SIZE + DB_MAX_OVERFLOW if DB_POOL_MODE == "queue" else 40
+    ))
+
+    # Token para los endpoints de métricas internas (/api/db-pool, ...), que se
+    # envía en la cabecera X-Metrics-Token. Sin token configurado no se sirven
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Contador de reproducciones con escritura diferida: cada cuánto se vuelca a
+    # la BD y con cuántas reproducciones pendientes se despierta antes al worker
+    # (repartidas entre los shards; el volcado sigue siendo asíncrono).
+    # PLAY_COUNT_MAX_BUFFERED es el máximo de pendientes en memoria, también
+    # las que se perderían si el proceso muere: al llenarse un shard (su parte
+    # del máximo), sus reproducciones nuevas se descartan hasta el próximo volcado
+    PLAY_COUNT_FLUSH_INTERVAL = float(os.getenv("PLAY_COUNT_FLUSH_INTERVAL", 5))
+    PLAY_COUNT_MAX_PENDING = int(os.getenv("PLAY_COUNT_MAX_PENDING", 1000))
+    PLAY_COUNT_MAX_BUFFERED = int(os.getenv("PLAY_COUNT_MAX_BUFFERED", 100000))
+    PLAY_COUNT_SHARDS = int(os.getenv("PLAY_COUNT_SHARDS", 16))
+
+    # Máximo de elementos por página en los listados (offset y cursor)
+    PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", 200))
+
+    # Segundos que se cachean las sugerencias de seguimiento de cada usuario
+    SUGGESTIONS_CACHE_TTL = int(os.getenv("SUGGESTIONS_CACHE_TTL", 300))
+
+    # Cada cuántos segundos se reconcilian los contadores desnormalizados (0 = nunca)
+    COUNTERS_RECONCILE_INTERVAL = int(os.getenv("COUNTERS_RECONCILE_INTERVAL", 3600))
+    # Filas por UPDATE (y por commit) al reconciliar
+    COUNTERS_RECONCILE_BATCH = int(os.getenv("COUNTERS_RECONCILE_BATCH", 1000))
+
+    # Segundos que se cachean los contadores de notificaciones (badge) de cada usuario.
+    # La caché por defecto es por proceso: con varios workers es también el
+    # máximo desfase del badge entre ellos
+    NOTIFICATION_COUNTS_TTL = int(os.getenv("NOTIFICATION_COUNTS_TTL", 300))
+
+    # Canal push (SSE) de notificaciones: mensajes en cola por conexión y
+    # cada cuántos segundos se envía un comentario keep-alive
+    PUSH_MAX_QUEUE = int(os.getenv("PUSH_MAX_QUEUE", 100))
+    PUSH_HEARTBEAT_SECONDS = int(os.getenv("PUSH_HEARTBEAT_SECONDS", 25))
+    # Validez del token del canal push (POST /notifications/stream-token). Va en
+    # la URL del EventSource, así que caduca enseguida y solo abre el stream
+    STREAM_TOKEN_TTL_SECONDS = int(os.getenv("STREAM_TOKEN_TTL_SECONDS", 60))
+
+    # Reparto de tracks nuevos (notificaciones 'new_track' y feed): tamaño de
+    # lote del worker y umbral de seguidores a partir del cual el reparto se
+    # hace en lectura (pull); las notificaciones pull cubren los últimos N días
+    NOTIFICATION_FANOUT_CHUNK = int(os.getenv("NOTIFICATION_FANOUT_CHUNK", 1000))
+    NOTIFICATION_FANOUT_THRESHOLD = int(os.getenv("NOTIFICATION_FANOUT_THRESHOLD", 10000))
+    NOTIFICATION_PULL_WINDOW_DAYS = int(os.getenv("NOTIFICATION_PULL_WINDOW_DAYS", 30))
+    # El badge (/notifications/stats) hace el pull como mucho cada N segundos por usuario
+    NOTIFICATION_PULL_INTERVAL = int(os.getenv("NOTIFICATION_PULL_INTERVAL", 30))
+
+    # Tracks recientes de un artista que se copian al feed al empezar a seguirle
+    FEED_BACKFILL_TRACKS = int(os.getenv("FEED_BACKFILL_TRACKS", 20))
+
+    # Agrupación de notificaciones ("X y 41 más empezaron a seguirte"): minutos
+    # que un grupo no leído sigue abierto desde su última actividad y cuántos
+    # remitentes de muestra se guardan por grupo
+    NOTIFICATION_GROUP_WINDOW_MINUTES = int(os.getenv("NOTIFICATION_GROUP_WINDOW_MINUTES", 1440))
+    NOTIFICATION_GROUP_SAMPLE_SIZE = int(os.getenv("NOTIFICATION_GROUP_SAMPLE_SIZE", 3))
+
+    # Retención de notificaciones: días que se guardan las leídas. La purga corre
+    # cada N segundos (0 = desactivada) borrando lotes pequeños con una pausa entre ellos.
+    # NOTIFICATION_MAX_AGE_DAYS es un tope opcional que borra también las NO leídas
+    # (0 = desactivado, por defecto)
+    NOTIFICATION_READ_TTL_DAYS = int(os.getenv("NOTIFICATION_READ_TTL_DAYS", 30))
+    NOTIFICATION_MAX_AGE_DAYS = int(os.getenv("NOTIFICATION_MAX_AGE_DAYS", 0))
+    NOTIFICATION_PURGE_INTERVAL = int(os.getenv("NOTIFICATION_PURGE_INTERVAL", 600))
+    NOTIFICATION_PURGE_BATCH = int(os.getenv("NOTIFICATION_PURGE_BATCH", 500))
+    NOTIFICATION_PURGE_PAUSE = float(os.getenv("NOTIFICATION_PURGE_PAUSE", 0.05))
+    # Segundos que se cachea el tamaño de la tabla en /api/notifications-retention
+    NOTIFICATION_RETENTION_STATS_TTL = int(os.getenv("NOTIFICATION_RETENTION_STATS_TTL", 300))
+    # Particiones mensuales que se crean por adelantado (solo Postgres con la
+    # tabla notifications ya particionada por RANGE (created_at))
+    NOTIFICATION_PARTITIONS_AHEAD = int(os.getenv("NOTIFICATION_PARTITIONS_AHEAD", 3))
+
+    # Árbol de comentarios (?tree=true): profundidad máxima de respuestas y
+    # máximo de respuestas cargadas por página
+    COMMENT_TREE_MAX_DEPTH = int(os.getenv("COMMENT_TREE_MAX_DEPTH", 5))
+    COMMENT_TREE_MAX_NODES = int(os.getenv("COMMENT_TREE_MAX_NODES", 500))
+
+    # Línea de tiempo de comentarios de un track (marcadores sobre la onda):
+    # tamaño de bucket por defecto (segundos; solo se cachea el histograma de
+    # este tamaño), TTL del histograma cacheado y
+    # máximo de comentarios devueltos para una ventana [from, to]
+    COMMENT_TIMELINE_BUCKET = int(os.getenv("COMMENT_TIMELINE_BUCKET", 10))
+    COMMENT_TIMELINE_CACHE_TTL = int(os.getenv("COMMENT_TIMELINE_CACHE_TTL", 600))
+    COMMENT_TIMELINE_MAX_COMMENTS = int(os.getenv("COMMENT_TIMELINE_MAX_COMMENTS", 200))
+
+    # Tracks en tendencia: cada reproducción/like/comentario suma su peso a la
+    # puntuación del track, que se reduce a la mitad cada N horas. Los eventos
+    # se vuelcan y el top N (global y por género) se recalcula cada N segundos
+    # con los tracks que han tenido actividad en los últimos N días
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24))
+    TRENDING_PLAY_WEIGHT = float(os.getenv("TRENDING_PLAY_WEIGHT", 1))
+    TRENDING_LIKE_WEIGHT = float(os.getenv("TRENDING_LIKE_WEIGHT", 5))
+    TRENDING_COMMENT_WEIGHT = float(os.getenv("TRENDING_COMMENT_WEIGHT", 3))
+    TRENDING_TOP_N = int(os.getenv("TRENDING_TOP_N", 100))
+    TRENDING_REFRESH_INTERVAL = int(os.getenv("TRENDING_REFRESH_INTERVAL", 60))
+    TRENDING_WINDOW_DAYS = int(os.getenv("TRENDING_WINDOW_DAYS", 7))
+
+    # Recomendador por likes compartidos: vecinos guardados por track, mínimo
+    # de usuarios en común para considerar dos tracks parecidos, cada cuántos
+    # segundos se recalculan los tracks con likes nuevos y cada cuántos se
+    # reconstruye la tabla completa (0 = nunca)
+    RECOMMENDER_TOP_K = int(os.getenv("RECOMMENDER_TOP_K", 20))
+    RECOMMENDER_MIN_COLIKES = int(os.getenv("RECOMMENDER_MIN_COLIKES", 1))
+    RECOMMENDER_UPDATE_INTERVAL = int(os.getenv("RECOMMENDER_UPDATE_INTERVAL", 60))
+    RECOMMENDER_REBUILD_INTERVAL = int(os.getenv("RECOMMENDER_REBUILD_INTERVAL", 21600))
+    # Likes más recientes del usuario que se usan para sus recomendaciones
+    RECOMMENDER_USER_LIKES = int(os.getenv("RECOMMENDER_USER_LIKES", 200))
+
+    # Descubrimiento por BPM: tolerancia por defecto (%) alrededor del BPM
+    # objetivo, como el rango del pitch de un DJ
+    DISCOVER_BPM_TOLERANCE = float(os.getenv("DISCOVER_BPM_TOLERANCE", 6))
+
+    # Lectura por lotes (GET /tracks?ids=... y GET /users?ids=...): máximo de
+    # ids por petición
+    BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", 100))
+
     SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
     APP_NAME = os.getenv("APP_NAME", "FLAZIC-API")
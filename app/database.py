@@ -1,29 +1,112 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
 from .config import settings
 
 engine = None
 SessionLocal = None
 Base = declarative_base()
 
+POOL_MODES = ("serverless", "queue", "pgbouncer")
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión libre"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self.wait_lock:
+                self.wait_count += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+def _engine_options():
+    """Opciones de create_engine según settings.DB_POOL_MODE"""
+    mode = settings.DB_POOL_MODE
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE no válido: {mode}. Usa: {', '.join(POOL_MODES)}")
+
+    if mode == "queue":
+        return {
+            "poolclass": TimedQueuePool,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_pre_ping": True,
+        }
+
+    options = {
+        "poolclass": NullPool,      # serverless: sin pool
+        "pool_pre_ping": True,
+    }
+    if mode == "pgbouncer" and settings.DATABASE_URL.startswith("postgresql+psycopg://"):
+        # PgBouncer en modo transaction no soporta prepared statements
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
+
 def init_engine():
     global engine, SessionLocal
     if engine:
         return
     try:
-        engine = create_engine(
-            settings.DATABASE_URL,
-            poolclass=NullPool,      # serverless: sin pool
-            pool_pre_ping=True,
-        )
+        engine = create_engine(settings.DATABASE_URL, **_engine_options())
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        print(f"[DB] Connected using {settings.DATABASE_URL.split('?')[0]}")
+        print(f"[DB] Connected using {settings.DATABASE_URL.split('?')[0]} (pool: {settings.DB_POOL_MODE})")
     except Exception as e:
         import traceback; traceback.print_exc()
         raise
 
+def threadpool_size() -> int:
+    """Tamaño del threadpool de handlers, sin superar las conexiones del pool 'queue'"""
+    size = settings.DB_THREADPOOL_SIZE
+    if settings.DB_POOL_MODE == "queue":
+        capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        if size > capacity:
+            print(f"⚠️ DB_THREADPOOL_SIZE={size} supera el pool de conexiones ({capacity}): se usa {capacity}")
+            size = capacity
+    return size
+
+def get_pool_stats():
+    """Métricas del pool de conexiones para dimensionarlo bajo carga"""
+    if not engine:
+        init_engine()
+    pool = engine.pool
+    stats = {
+        "mode": settings.DB_POOL_MODE,
+        "pool_class": type(pool).__name__,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool.wait_lock:
+            stats.update({
+                "checkouts": pool.wait_count,
+                "wait_avg_ms": round(pool.wait_total / pool.wait_count * 1000, 3) if pool.wait_count else 0.0,
+                "wait_max_ms": round(pool.wait_max * 1000, 3),
+            })
+    return stats
+
 def get_db():
     if not SessionLocal:
         init_engine()
@@ -33,5 +116,77 @@ def get_db():
     finally:
         db.close()
 
+def add_missing_columns():
+    """
+    Añade a las tablas existentes las columnas nuevas de los modelos
+    (create_all solo crea tablas que no existen, no altera las existentes)
+
+    Si la columna declara info={"backfill": "<expresión SQL>"}, las filas que
+    ya existían se rellenan con ese valor en la misma transacción.
+    """
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    ddl += f" DEFAULT {default.text if hasattr(default, 'text') else repr(str(default))}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                print(f"[DB] Columna añadida: {table.name}.{column.name}")
+                # Columnas derivadas (p. ej. contadores): rellenar las filas existentes
+                backfill = column.info.get("backfill")
+                if backfill:
+                    conn.execute(text(f"UPDATE {table.name} SET {column.name} = {backfill}"))
+
+def add_missing_indexes():
+    """
+    Crea en las tablas existentes los índices nuevos de los modelos
+
+    Si el índice declara info={"before_create": "<SQL>"} (p. ej. borrar
+    duplicados antes de un índice único), se ejecuta justo antes de crearlo.
+
+    En Postgres se crean con CREATE INDEX CONCURRENTLY (fuera de transacción,
+    en autocommit) para no bloquear las escrituras en tablas grandes. Si falla,
+    se borra el índice inválido que deja para reintentarlo en el próximo arranque.
+    """
+    concurrently = engine.dialect.name == "postgresql"
+    if concurrently:
+        connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    else:
+        connection = engine.begin()
+    with connection as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                before_create = index.info.get("before_create")
+                if before_create:
+                    conn.execute(text(before_create))
+                if not concurrently:
+                    index.create(bind=conn)
+                else:
+                    options = index.dialect_options["postgresql"]
+                    options["concurrently"] = True
+                    try:
+                        index.create(bind=conn)
+                    except Exception:
+                        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+                        raise
+                    finally:
+                        options["concurrently"] = False
+                print(f"[DB] Índice creado: {index.name}")
+
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    add_missing_indexes()
@@ -1,15 +1,29 @@
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+from anyio import to_thread
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.routes import users, tracks, follow, comment, events, notifications, playlists, social_links
+from app.database import get_db, get_pool_stats, threadpool_size
+from app.routes import users, tracks, follow, comment, events, notifications, playlists, social_links, feed, recommendations
 from app.routes.auth import router as auth_router
 from app.database import create_tables
+from app.config import settings
 from .database import init_engine
 from sqlalchemy import text
 from app.models.user import User
+from app.utils.play_counter import play_counter
+from app.utils.search import setup_search
+from app.utils.counters import run_reconciliation
+from app.utils.hashing import password_hasher
+from app.utils.fanout import fanout
+from app.utils.retention import retention
+from app.utils.trending import trending
+from app.utils.recommender import recommender
+from app.utils.genres import normalize_existing_genres
+from app.utils.security import require_metrics_token
+from app import database
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -21,16 +35,67 @@ async def lifespan(app: FastAPI):
     except Exception:
         # Deja trazas en logs y evita ocultar el error
         raise
+
+    # Los routers con acceso a BD usan handlers síncronos que FastAPI ejecuta
+    # en este threadpool: su tamaño limita las consultas concurrentes
+    to_thread.current_default_thread_limiter().total_tokens = threadpool_size()
+
     try:
         create_tables()
         print("✅ Tablas creadas exitosamente")
+        setup_search(database.engine)
+        retention.setup(database.engine)
+        normalize_existing_genres(database.engine)
     except Exception as e:
         print(f"❌ Error creando tablas: {e}")
     
+    # Volcado periódico de reproducciones pendientes
+    play_count_task = asyncio.create_task(play_counter.run())
+
+    # Worker de reparto de notificaciones de tracks nuevos
+    fanout_task = asyncio.create_task(fanout.run())
+
+    # Volcado de eventos y recálculo periódico de los tracks en tendencia
+    trending_task = asyncio.create_task(trending.run())
+
+    # Vecinos de tracks por likes compartidos (incremental + reconstrucción periódica)
+    recommender_task = asyncio.create_task(recommender.run())
+
+    # Reconciliación periódica de contadores (follower_count, like_count, ...)
+    reconcile_task = None
+    if settings.COUNTERS_RECONCILE_INTERVAL > 0:
+        reconcile_task = asyncio.create_task(run_reconciliation(settings.COUNTERS_RECONCILE_INTERVAL))
+
+    # Purga por lotes de notificaciones caducadas
+    purge_task = None
+    if settings.NOTIFICATION_PURGE_INTERVAL > 0:
+        purge_task = asyncio.create_task(retention.run(settings.NOTIFICATION_PURGE_INTERVAL))
+
     print("🎵 FLAZIC-API lista para recibir peticiones")
     yield
     print("🔌 Cerrando FLAZIC-API...")
 
+    play_count_task.cancel()
+    if reconcile_task:
+        reconcile_task.cancel()
+    if purge_task:
+        purge_task.cancel()
+    fanout_task.cancel()
+    trending_task.cancel()
+    recommender_task.cancel()
+    try:
+        await to_thread.run_sync(fanout.drain)
+    except Exception as e:
+        print(f"❌ Error repartiendo notificaciones pendientes: {e}")
+    try:
+        await to_thread.run_sync(play_counter.flush)
+    except Exception as e:
+        print(f"❌ Error volcando reproducciones: {e}")
+    try:
+        await to_thread.run_sync(trending.flush)
+    except Exception as e:
+        print(f"❌ Error volcando eventos de tendencias: {e}")
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title="FLAZIC-API",
@@ -48,6 +113,8 @@ app.include_router(follow.router)
 app.include_router(comment.router)
 app.include_router(playlists.router)
 app.include_router(notifications.router)
+app.include_router(feed.router)
+app.include_router(recommendations.router)
 # app.include_router(events.router)
 # app.include_router(social_links.router)
 
@@ -86,6 +153,26 @@ async def db_test(db: Session = Depends(get_db)):
     # db es tu "ayudante de cocina" listo para trabajar
     return {"message": "✅ Base de datos conectada", "db_type": str(type(db))}
 
+@app.get("/api/db-pool", dependencies=[Depends(require_metrics_token)])
+async def db_pool():
+    """Métricas del pool de conexiones (checked-out, overflow, tiempo de espera)"""
+    return get_pool_stats()
+
+@app.get("/api/password-hashing", dependencies=[Depends(require_metrics_token)])
+async def password_hashing_metrics():
+    """Métricas del pool de bcrypt (latencia, operaciones en curso, rechazos)"""
+    return password_hasher.metrics()
+
+@app.get("/api/notifications-retention", dependencies=[Depends(require_metrics_token)])
+def notifications_retention_metrics():
+    """Métricas de retención de notificaciones (tamaño de la tabla, filas purgadas por segundo)"""
+    return retention.metrics()
+
+@app.get("/api/recommender", dependencies=[Depends(require_metrics_token)])
+async def recommender_metrics():
+    """Métricas del recomendador (duración y tamaño de la última actualización/reconstrucción)"""
+    return recommender.metrics()
+
 @app.get("/api/db-users-count")
 async def db_users_count(db: Session = Depends(get_db)):
     try:
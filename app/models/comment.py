@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -49,6 +49,14 @@ class Comment(Base):
     # Respuestas a este comentario
     replies = relationship("Comment", back_populates="parent", cascade="all, delete-orphan")
     
+    # 📇 ÍNDICES
+    # Paginación por cursor (created_at, id) de los comentarios de un track
+    # y línea de tiempo (histograma y ventanas por timestamp_seconds)
+    __table_args__ = (
+        Index('ix_comments_track_created_at_id', 'track_id', 'created_at', 'id'),
+        Index('ix_comments_track_timestamp', 'track_id', 'timestamp_seconds'),
+    )
+    
     def __repr__(self):
         """Cómo se muestra este comentario en los logs"""
         timestamp = f"at {self.timestamp_seconds}s" if self.timestamp_seconds else ""
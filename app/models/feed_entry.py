@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class FeedEntry(Base):
+    """Modelo de Entrada del Feed - Como la bandeja de novedades de cada oyente"""
+
+    __tablename__ = "feed_entries"  # 📰 La línea de tiempo de cada usuario
+
+    # 🆔 ID DE LA ENTRADA (Primary Key)
+    id = Column(Integer, primary_key=True, index=True)
+
+    # 👤 DUEÑO DEL FEED (Foreign Key)
+    # El seguidor en cuya línea de tiempo aparece el track
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # 🎵 TRACK PUBLICADO (Foreign Key)
+    track_id = Column(Integer, ForeignKey("tracks.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # 🎤 ARTISTA (Foreign Key)
+    # Quién publicó el track (para limpiar el feed al dejar de seguirle)
+    artist_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # ⏰ FECHA DE PUBLICACIÓN
+    # Copia de tracks.created_at: el feed se ordena por (created_at, track_id)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    # 🚫 RESTRICCIÓN ÚNICA E ÍNDICES
+    # Un track aparece una sola vez en cada feed; paginación por cursor del feed
+    __table_args__ = (
+        UniqueConstraint('user_id', 'track_id', name='uq_feed_user_track'),
+        Index('ix_feed_entries_user_created_at_track', 'user_id', 'created_at', 'track_id'),
+        Index('ix_feed_entries_user_artist', 'user_id', 'artist_id'),
+    )
+
+    def __repr__(self):
+        """Cómo se muestra esta entrada en los logs"""
+        return f"<FeedEntry Track {self.track_id} in feed of User {self.user_id}>"
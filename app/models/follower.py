@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -35,6 +35,9 @@ class Follower(Base):
     # No puedes seguir a la misma persona dos veces
     __table_args__ = (
         UniqueConstraint('follower_id', 'following_id', name='uq_follower_following'),
+        # Paginación por cursor (created_at, id) de seguidores y seguidos
+        Index('ix_followers_following_created_at_id', 'following_id', 'created_at', 'id'),
+        Index('ix_followers_follower_created_at_id', 'follower_id', 'created_at', 'id'),
     )
     
     def __repr__(self):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -35,6 +35,18 @@ class Notification(Base):
     # Cuándo se generó la notificación
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # 🔄 ÚLTIMA ACTIVIDAD
+    # Cuándo se sumó el último remitente al grupo. created_at no cambia nunca
+    # (es la clave de los cursores y de "marcar hasta aquí")
+    last_activity_at = Column(DateTime(timezone=True), default=func.now(), info={"backfill": "created_at"})
+    
+    # 👥 AGRUPACIÓN
+    # Las notificaciones repetidas (p. ej. varios follows seguidos) se acumulan
+    # en una sola fila: cuántos usuarios la generaron y una muestra de sus IDs
+    # (el más reciente primero; from_user_id es siempre el último)
+    actor_count = Column(Integer, nullable=False, default=1, server_default="1")
+    sender_sample = Column(JSON, nullable=True)
+    
     # 🔗 RELACIONES
     
     # Usuario que recibe la notificación
@@ -43,6 +55,27 @@ class Notification(Base):
     # Usuario que causó la notificación
     sender = relationship("User", foreign_keys=[from_user_id], back_populates="notifications_sent")
     
+    # 📇 ÍNDICES
+    # Paginación por cursor (created_at, id) dentro de la bandeja de cada usuario
+    # y un índice parcial solo con las no leídas (badge y "marcar todas")
+    __table_args__ = (
+        Index('ix_notifications_user_created_at_id', 'user_id', 'created_at', 'id'),
+        Index('ix_notifications_user_unread', 'user_id', 'created_at',
+              postgresql_where=(is_read == False), sqlite_where=(is_read == False)),
+        # Comprobar si ya existe la notificación de un elemento (p. ej. new_track)
+        Index('ix_notifications_user_type_target', 'user_id', 'type', 'target_id'),
+        # Un solo 'new_track' por usuario y track (el pull y el reparto usan ON CONFLICT DO NOTHING);
+        # antes de crearlo se borran los duplicados que ya hubiera
+        Index('ux_notifications_user_new_track', 'user_id', 'target_id', unique=True,
+              postgresql_where=(type == 'new_track'), sqlite_where=(type == 'new_track'),
+              info={"before_create": (
+                  "DELETE FROM notifications WHERE type = 'new_track' AND id NOT IN "
+                  "(SELECT min(id) FROM notifications WHERE type = 'new_track' GROUP BY user_id, target_id)"
+              )}),
+        # Purga por antigüedad (retención)
+        Index('ix_notifications_created_at', 'created_at'),
+    )
+    
     def __repr__(self):
         """Cómo se muestra esta notificación en los logs"""
         return f"<Notification {self.type} from User {self.from_user_id} to User {self.user_id}>"
@@ -56,7 +89,9 @@ class Notification(Base):
             "type": self.type,
             "target_id": self.target_id,
             "is_read": self.is_read,
+            "actor_count": self.actor_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
+            "last_activity_at": self.last_activity_at.isoformat() if self.last_activity_at else None,
             # Información del remitente
             "sender": self.sender.to_dict() if self.sender else None,
             # Mensaje formateado para mostrar
@@ -66,6 +101,16 @@ class Notification(Base):
     
     def get_message(self) -> str:
         """Genera el mensaje de la notificación según el tipo"""
+        others = (self.actor_count or 1) - 1
+        if others > 0:
+            name = self.sender.display_name or self.sender.username
+            grouped_messages = {
+                'follow': f"{name} y {others} más empezaron a seguirte",
+                'like': f"A {name} y {others} más les gusta tu track",
+                'comment': f"{name} y {others} más comentaron en tu track",
+            }
+            if self.type in grouped_messages:
+                return grouped_messages[self.type]
         messages = {
             'follow': f"{self.sender.display_name or self.sender.username} empezó a seguirte",
             'like': f"A {self.sender.display_name or self.sender.username} le gusta tu track",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -41,7 +41,16 @@ class Playlist(Base):
     dj = relationship("User", back_populates="playlists")
     
     # Canciones incluidas en esta playlist (a través de PlaylistTrack)
-    playlist_tracks = relationship("PlaylistTrack", back_populates="playlist", cascade="all, delete-orphan")
+    playlist_tracks = relationship(
+        "PlaylistTrack", back_populates="playlist", cascade="all, delete-orphan",
+        order_by="PlaylistTrack.position"
+    )
+    
+    # 📇 ÍNDICES
+    # Paginación por cursor (created_at, id)
+    __table_args__ = (
+        Index('ix_playlists_created_at_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         """Cómo se muestra esta playlist en los logs"""
@@ -64,4 +73,4 @@ class Playlist(Base):
     
     def get_total_duration(self):
         """Calcula la duración total de la playlist en segundos"""
-        return sum(track.track.duration_seconds for track in self.playlist_tracks if track.track.duration_seconds)
\ No newline at end of file
+        return sum(track.track.duration_seconds for track in self.playlist_tracks if track.track.duration_seconds)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, ForeignKey, Integer, String, Text, DateTime, Boolean, Float, Index
 from sqlalchemy.sql import func
 from app.database import Base
 from sqlalchemy.orm import relationship
@@ -18,12 +18,28 @@ class Track(Base):
     bpm= Column(Integer)
     is_public= Column(Boolean, default=True, index=True)
     play_count= Column(Integer, default=0)
+    like_count= Column(Integer, nullable=False, default=0, server_default="0")
+    # Puntuación de tendencia con decaimiento: vale trending_score en
+    # trending_updated_at y se reduce a la mitad cada TRENDING_HALF_LIFE_HOURS
+    trending_score= Column(Float, nullable=False, default=0, server_default="0")
+    trending_updated_at= Column(DateTime(timezone=True), nullable=True)
     created_at= Column(DateTime(timezone=True), server_default=func.now())
     updated_at= Column(DateTime(timezone=True), onupdate=func.now())
     comments = relationship("Comment", back_populates="track", cascade="all, delete-orphan")
     playlist_tracks = relationship("PlaylistTrack", back_populates="track", cascade="all, delete-orphan")
     likes = relationship("Like", back_populates="track", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Paginación por cursor (created_at, id)
+        Index('ix_tracks_created_at_id', 'created_at', 'id'),
+        # Candidatos a tendencia: tracks con actividad reciente
+        Index('ix_tracks_trending_updated_at', 'trending_updated_at'),
+        # Descubrimiento: géneros exactos (normalizados) + rango de BPM,
+        # o solo rango de BPM sobre el catálogo público
+        Index('ix_tracks_genre_bpm', 'genre', 'bpm'),
+        Index('ix_tracks_public_bpm', 'is_public', 'bpm'),
+    )
+
 
 
     def __repr__(self):
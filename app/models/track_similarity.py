@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, UniqueConstraint, Index
+from app.database import Base
+
+class TrackSimilarity(Base):
+    """Modelo de Similitud entre Tracks - Como el "a quien le gustó esto también le gustó..." """
+
+    __tablename__ = "track_similarities"  # 🧭 Los K vecinos más parecidos de cada track
+
+    # 🆔 ID DE LA FILA (Primary Key)
+    id = Column(Integer, primary_key=True)
+
+    # 🎵 TRACK DE ORIGEN (Foreign Key)
+    track_id = Column(Integer, ForeignKey("tracks.id", ondelete="CASCADE"), nullable=False)
+
+    # 🎶 TRACK PARECIDO (Foreign Key)
+    similar_track_id = Column(Integer, ForeignKey("tracks.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # 📈 SIMILITUD
+    # Coseno entre los conjuntos de usuarios que dieron like a cada track (0-1)
+    score = Column(Float, nullable=False)
+
+    # 🚫 RESTRICCIÓN ÚNICA E ÍNDICES
+    # Un vecino por pareja; los vecinos de un track se leen ordenados por similitud
+    __table_args__ = (
+        UniqueConstraint('track_id', 'similar_track_id', name='uq_track_similarity'),
+        Index('ix_track_similarities_track_score', 'track_id', 'score'),
+    )
+
+    def __repr__(self):
+        """Cómo se muestra esta similitud en los logs"""
+        return f"<TrackSimilarity {self.track_id} ~ {self.similar_track_id} ({self.score:.3f})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from app.database import Base
 from sqlalchemy.orm import relationship
@@ -21,6 +21,12 @@ class User(Base):
     website_url = Column(String(500))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Contadores desnormalizados (ver app/utils/counters.py)
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0", index=True,
+                            info={"backfill": "(SELECT count(*) FROM followers WHERE followers.following_id = users.id)"})
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    track_count = Column(Integer, nullable=False, default=0, server_default="0")  # tracks públicos
+    total_plays = Column(Integer, nullable=False, default=0, server_default="0")  # de tracks públicos
     tracks = relationship("Track", back_populates="artist", cascade="all, delete-orphan")
     # social_links = relationship("SocialLink", back_populates="artist", cascade="all, delete-orphan")
     # events = relationship("Event", back_populates="organizer", cascade="all, delete-orphan")
@@ -42,6 +48,11 @@ class User(Base):
     following = relationship("Follower", foreign_keys=[Follower.follower_id], 
                             back_populates="follower",
                             cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Paginación por cursor (created_at, id)
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
     
 
     def __repr__(self):
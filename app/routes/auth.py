@@ -1,3 +1,4 @@
+from anyio import to_thread
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
@@ -6,11 +7,11 @@ from app.config import settings
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.utils.security import (
-    create_password_hash, 
-    verify_password, 
+    password_needs_rehash,
     create_access_token,
     verify_token
 )
+from app.utils.hashing import password_hasher
 from datetime import timedelta
 from sqlalchemy.exc import IntegrityError
 import logging, traceback
@@ -20,15 +21,41 @@ log = logging.getLogger("flazic")
 router = APIRouter(prefix="/auth", tags=["autentificacion"])
 security = HTTPBearer()
 
+# register/login son async para esperar a bcrypt (pool acotado con 429);
+# el acceso a la BD, que es síncrono, se hace en el threadpool
+
+def _find_registered(db: Session, username: str, email: str):
+    return db.query(User).filter(
+        (User.username == username) | (User.email == email)
+    ).first()
+
+def _save_new_user(db: Session, new_user: User) -> User:
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+
+    if new_user.created_at is None:
+        new_user = db.query(User).filter(User.id == new_user.id).first()
+    return new_user
+
+def _find_login(db: Session, identifier: str):
+    return db.query(User).filter(
+        (User.email == identifier) | 
+        (User.username == identifier)
+    ).first()
+
+def _save_rehash(db: Session, user: User, password_hash: str):
+    user.password_hash = password_hash
+    db.commit()
+    db.refresh(user)
+
 @router.post("/register", response_model=UserResponse, response_model_exclude_none=True, status_code=201)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     try:
         username = user_data.username.strip()
         email = user_data.email.strip().lower()
 
-        exists = db.query(User).filter(
-            (User.username == username) | (User.email == email)
-        ).first()
+        exists = await to_thread.run_sync(_find_registered, db, username, email)
         if exists:
             if exists.username == username:
                 raise HTTPException(status_code=400, detail="Este nombre de usuario ya está registrado")
@@ -38,27 +65,22 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
             username=username,
             email=email,
             display_name=user_data.display_name or username,
-            password_hash=create_password_hash(user_data.password),
+            password_hash=await password_hasher.hash(user_data.password),
         )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-
-        if new_user.created_at is None:
-            new_user = db.query(User).filter(User.id == new_user.id).first()
+        new_user = await to_thread.run_sync(_save_new_user, db, new_user)
 
         return UserResponse.model_validate(new_user)
 
     except IntegrityError as ie:
-        db.rollback()
+        await to_thread.run_sync(db.rollback)
         msg = str(ie.orig) if hasattr(ie, "orig") else str(ie)
         log.error(f"IntegrityError on register: {msg}")
         raise HTTPException(status_code=400, detail="Usuario o email ya registrado")
     except HTTPException:
-        db.rollback()
+        await to_thread.run_sync(db.rollback)
         raise
     except Exception as e:
-        db.rollback()
+        await to_thread.run_sync(db.rollback)
         traceback.print_exc()
         msg = f"Register failed: {e}" if settings.DEBUG else "Register failed"
         raise HTTPException(status_code=500, detail=msg)
@@ -66,17 +88,19 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login")
 async def login(login_data: UserLogin, db: Session = Depends(get_db)):
 
-    user = db.query(User).filter(
-        (User.email == login_data.email) | 
-        (User.username == login_data.email)
-    ).first()
+    user = await to_thread.run_sync(_find_login, db, login_data.email)
 
-    if not user or not verify_password(login_data.password, user.password_hash):
+    if not user or not await password_hasher.verify(login_data.password, user.password_hash):
         raise HTTPException(
             status_code=401,
             detail="Credenciales incorrectas"
         )
     
+    # Si cambió BCRYPT_ROUNDS, actualizar el hash ahora que conocemos la contraseña
+    if password_needs_rehash(user.password_hash):
+        password_hash = await password_hasher.hash(login_data.password)
+        await to_thread.run_sync(_save_rehash, db, user, password_hash)
+
 
     access_token = create_access_token(
         data={"sub": str(user.id)},  # "sub" = subject (quién es el usuario)
@@ -96,7 +120,7 @@ async def logout():
     return {"message": "Logout exitoso - Token debe ser eliminado del frontend"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(
+def get_current_user(
     token: str = Depends(security), 
     db: Session = Depends(get_db)
 ):
@@ -6,16 +6,21 @@ from app.database import get_db
 from app.models.comment import Comment
 from app.models.track import Track
 from app.models.user import User
-from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse
-from app.utils.security import get_current_user
+from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse, CommentTreeNode
+from app.utils.security import get_current_writer, Principal
+from app.utils.loaders import comment_response_options
+from app.utils.comment_threads import build_thread
+from app.utils.comment_timeline import invalidate_timeline
+from app.utils.trending import trending
+from app.config import settings
 
 router = APIRouter(prefix="/comments", tags=["comentarios"])
 
 @router.post("/", response_model=CommentResponse)
-async def create_comment(
+def create_comment(
     comment_data: CommentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """🎯 Crear nuevo comentario en un track"""
     try:
@@ -43,6 +48,9 @@ async def create_comment(
         db.add(new_comment)
         db.commit()
         db.refresh(new_comment)
+        if new_comment.timestamp_seconds is not None:
+            invalidate_timeline(new_comment.track_id)
+        trending.record(new_comment.track_id, settings.TRENDING_COMMENT_WEIGHT)
         
         return new_comment
         
@@ -53,7 +61,7 @@ async def create_comment(
         raise HTTPException(status_code=500, detail=f"Error al crear comentario: {str(e)}")
 
 @router.get("/{comment_id}", response_model=CommentResponse)
-async def get_comment(
+def get_comment(
     comment_id: int,
     db: Session = Depends(get_db)
 ):
@@ -69,11 +77,11 @@ async def get_comment(
         raise HTTPException(status_code=500, detail=f"Error al obtener comentario: {str(e)}")
 
 @router.put("/{comment_id}", response_model=CommentResponse)
-async def update_comment(
+def update_comment(
     comment_id: int,
     comment_data: CommentUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """🎯 Actualizar comentario"""
     try:
@@ -90,6 +98,8 @@ async def update_comment(
         
         db.commit()
         db.refresh(comment)
+        if "timestamp_seconds" in update_data:
+            invalidate_timeline(comment.track_id)
         return comment
         
     except HTTPException:
@@ -99,10 +109,10 @@ async def update_comment(
         raise HTTPException(status_code=500, detail=f"Error al actualizar comentario: {str(e)}")
 
 @router.delete("/{comment_id}")
-async def delete_comment(
+def delete_comment(
     comment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """🎯 Eliminar comentario"""
     try:
@@ -113,8 +123,11 @@ async def delete_comment(
         if comment.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="No tienes permisos para eliminar este comentario")
         
+        track_id = comment.track_id
         db.delete(comment)
         db.commit()
+        # Borrar un comentario también borra sus respuestas (cascade)
+        invalidate_timeline(track_id)
         return {"message": "Comentario eliminado correctamente"}
         
     except HTTPException:
@@ -123,9 +136,11 @@ async def delete_comment(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar comentario: {str(e)}")
 
-@router.get("/{comment_id}/replies", response_model=List[CommentResponse])
-async def get_comment_replies(
+@router.get("/{comment_id}/replies", response_model=List[CommentTreeNode])
+def get_comment_replies(
     comment_id: int,
+    tree: bool = Query(False, description="Incluir también las respuestas de las respuestas"),
+    depth: Optional[int] = Query(None, ge=1, description="Niveles de respuestas a incluir con tree=true"),
     db: Session = Depends(get_db)
 ):
     """🎯 Obtener respuestas de un comentario"""
@@ -134,11 +149,11 @@ async def get_comment_replies(
         if not comment:
             raise HTTPException(status_code=404, detail="Comentario no encontrado")
         
-        replies = db.query(Comment).filter(
+        replies = db.query(Comment).options(*comment_response_options()).filter(
             Comment.parent_comment_id == comment_id
         ).order_by(Comment.created_at.asc()).all()
         
-        return replies
+        return build_thread(db, replies, tree, depth)
         
     except HTTPException:
         raise
@@ -12,7 +12,7 @@ from app.utils.security import get_current_user
 router = APIRouter(prefix="/events", tags=["eventos"])
 
 @router.get("/", response_model=List[EventSummary])
-async def get_events(
+def get_events(
     skip: int = Query(0, description="Saltar primeros N eventos"),
     limit: int = Query(50, description="Límite de eventos a devolver"),
     upcoming_only: bool = Query(True, description="Solo eventos futuros"),
@@ -44,7 +44,7 @@ async def get_events(
         raise HTTPException(status_code=500, detail=f"Error al obtener eventos: {str(e)}")
 
 @router.post("/", response_model=EventResponse)
-async def create_event(
+def create_event(
     event_data: EventCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -75,7 +75,7 @@ async def create_event(
         raise HTTPException(status_code=500, detail=f"Error al crear evento: {str(e)}")
 
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event(
+def get_event(
     event_id: int,
     db: Session = Depends(get_db)
 ):
@@ -96,7 +96,7 @@ async def get_event(
         raise HTTPException(status_code=500, detail=f"Error al obtener evento: {str(e)}")
 
 @router.put("/{event_id}", response_model=EventResponse)
-async def update_event(
+def update_event(
     event_id: int,
     event_data: EventUpdate,
     db: Session = Depends(get_db),
@@ -130,7 +130,7 @@ async def update_event(
         raise HTTPException(status_code=500, detail=f"Error al actualizar evento: {str(e)}")
 
 @router.delete("/{event_id}")
-async def delete_event(
+def delete_event(
     event_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
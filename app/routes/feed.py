@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.track import TrackResponse
+from app.schemas.pagination import CursorPage
+from app.utils.security import get_current_principal, Principal
+from app.utils.pagination import CursorParams
+from app.utils.feed import feed_page
+
+router = APIRouter(prefix="/feed", tags=["feed"])
+
+@router.get("/", response_model=CursorPage[TrackResponse])
+def get_feed(
+    limit: int = Query(20, ge=1, le=100, description="Límite de tracks a devolver"),
+    page: CursorParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    🎯 Feed personal - Los tracks nuevos de los artistas que sigues, del más reciente al más antiguo
+    """
+    try:
+        tracks, next_cursor = feed_page(db, current_user.id, page.after, limit)
+        return {"items": tracks, "next_cursor": next_cursor}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener el feed: {str(e)}")
@@ -1,21 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Union
 
 from app.database import get_db
 from app.models.follower import Follower
 from app.models.user import User
-from app.models.notification import Notification
 from app.schemas.follower import FollowerResponse, FollowerStats, UnfollowResponse
-from app.utils.security import get_current_user
+from app.schemas.pagination import CursorPage
+from app.utils.security import get_current_principal, get_current_writer, Principal
+from app.utils.pagination import CursorParams
+from app.utils.suggestions import get_suggestions, invalidate_suggestions
+from app.utils.counters import bump_user
+from app.utils import feed, notification_counts
+from app.utils.notification_groups import add_notification
+from app.utils.pubsub import publish_to_user
+from app.config import settings
 
 router = APIRouter(prefix="/follow", tags=["seguidores"])
 
 @router.post("/{user_id}", response_model=None)
-async def toggle_follow(
+def toggle_follow(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Seguir/dejar de seguir usuario - Como seguir a un artista en redes sociales
@@ -39,6 +46,9 @@ async def toggle_follow(
         if existing_follow:
             # Dejar de seguir
             db.delete(existing_follow)
+            bump_user(db, user_id, follower_count=-1)
+            bump_user(db, current_user.id, following_count=-1)
+            feed.remove_artist(db, current_user.id, user_id)
             action = "unfollowed"
             message = f"Dejaste de seguir a {target_user.display_name or target_user.username}"
             
@@ -51,28 +61,43 @@ async def toggle_follow(
                 following_id=user_id
             )
             db.add(new_follow)
+            bump_user(db, user_id, follower_count=1)
+            bump_user(db, current_user.id, following_count=1)
+            feed.backfill_artist(db, current_user.id, user_id)
             
-            # Crear notificación para el usuario seguido
-            notification = Notification(
+            # Crear notificación para el usuario seguido (o sumarla a su grupo de follows)
+            notification, created = add_notification(
+                db,
                 user_id=user_id,  # El que recibe la notificación
                 from_user_id=current_user.id,  # El que sigue
                 type="follow",
                 target_id=current_user.id  # ID del seguidor
             )
-            db.add(notification)
+            # El payload se arma antes del commit, que expira la notificación
+            payload = {
+                "id": notification.id,
+                "type": notification.type,
+                "from_user_id": current_user.id,
+                "target_id": notification.target_id,
+                "actor_count": notification.actor_count,
+                "created_at": notification.created_at,
+                "last_activity_at": notification.last_activity_at,
+            }
             
             existing_follow = new_follow
             action = "followed"
             message = f"Empezaste a seguir a {target_user.display_name or target_user.username}"
         
         db.commit()
-        
+        invalidate_suggestions(current_user.id)
         if action == "followed":
+            if created:
+                notification_counts.notification_added(user_id)
+            publish_to_user(user_id, "notification", payload)
             db.refresh(existing_follow)
             return existing_follow
-        else:
-            if action == "unfollowed":
-                return {"message": message, "user_id": user_id}
+        
+        return {"message": message, "user_id": user_id}
         
     except HTTPException:
         raise
@@ -81,10 +106,10 @@ async def toggle_follow(
         raise HTTPException(status_code=500, detail=f"Error al gestionar seguimiento: {str(e)}")
 
 @router.get("/{user_id}/status")
-async def get_follow_status(
+def get_follow_status(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Verificar estado de seguimiento - Como ver si sigues a un artista
@@ -118,96 +143,99 @@ async def get_follow_status(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al verificar estado: {str(e)}")
 
-@router.get("/me/followers", response_model=List[FollowerResponse])
-async def get_my_followers(
+@router.get("/me/followers", response_model=Union[List[FollowerResponse], CursorPage[FollowerResponse]])
+def get_my_followers(
     skip: int = Query(0, description="Saltar primeros N seguidores"),
-    limit: int = Query(100, description="Límite de seguidores a devolver"),
+    limit: int = Query(100, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de seguidores a devolver"),
+    page: CursorParams = Depends(),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener mis seguidores - Como ver mi lista de fans
     """
     try:
-        followers = db.query(Follower).filter(
-            Follower.following_id == current_user.id
-        ).order_by(Follower.created_at.desc()).offset(skip).limit(limit).all()
+        query = db.query(Follower).filter(Follower.following_id == current_user.id)
+
+        if page.enabled:
+            followers, next_cursor = page.paginate(query, Follower.created_at, Follower.id, limit)
+            return {"items": followers, "next_cursor": next_cursor}
+
+        followers = query.order_by(Follower.created_at.desc()).offset(skip).limit(limit).all()
         
         return followers
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener seguidores: {str(e)}")
 
-@router.get("/me/following", response_model=List[FollowerResponse])
-async def get_my_following(
+@router.get("/me/following", response_model=Union[List[FollowerResponse], CursorPage[FollowerResponse]])
+def get_my_following(
     skip: int = Query(0, description="Saltar primeros N seguidos"),
-    limit: int = Query(100, description="Límite de seguidos a devolver"),
+    limit: int = Query(100, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de seguidos a devolver"),
+    page: CursorParams = Depends(),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener usuarios que sigo - Como ver mi lista de artistas favoritos
     """
     try:
-        following = db.query(Follower).filter(
-            Follower.follower_id == current_user.id
-        ).order_by(Follower.created_at.desc()).offset(skip).limit(limit).all()
+        query = db.query(Follower).filter(Follower.follower_id == current_user.id)
+
+        if page.enabled:
+            following, next_cursor = page.paginate(query, Follower.created_at, Follower.id, limit)
+            return {"items": following, "next_cursor": next_cursor}
+
+        following = query.order_by(Follower.created_at.desc()).offset(skip).limit(limit).all()
         
         return following
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener seguidos: {str(e)}")
 
 @router.get("/me/stats", response_model=FollowerStats)
-async def get_my_follow_stats(
+def get_my_follow_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener mis estadísticas de seguimiento - Como ver mis métricas sociales
     """
     try:
-        # Contar seguidores
-        follower_count = db.query(Follower).filter(
-            Follower.following_id == current_user.id
-        ).count()
-        
-        # Contar seguidos
-        following_count = db.query(Follower).filter(
-            Follower.follower_id == current_user.id
-        ).count()
+        # Contadores desnormalizados del propio usuario (sin COUNT): solo esas dos columnas
+        counts = db.query(User.follower_count, User.following_count).filter(
+            User.id == current_user.id
+        ).first()
+        if counts is None:
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
         return FollowerStats(
             user_id=current_user.id,
-            follower_count=follower_count,
-            following_count=following_count
+            follower_count=counts.follower_count,
+            following_count=counts.following_count
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas: {str(e)}")
 
 @router.get("/suggestions", response_model=List[FollowerResponse])
-async def get_follow_suggestions(
+def get_follow_suggestions(
     limit: int = Query(10, description="Límite de sugerencias"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener sugerencias de usuarios a seguir - Como descubrir nuevos artistas
     """
     try:
-        # Usuarios que no sigues y tienen muchos seguidores
-        suggestions = db.query(User).filter(
-            User.id != current_user.id,
-            ~User.id.in_(
-                db.query(Follower.following_id).filter(
-                    Follower.follower_id == current_user.id
-                )
-            )
-        ).order_by(
-            # Ordenar por popularidad (más seguidores primero)
-            db.query(Follower).filter(Follower.following_id == User.id).count().desc()
-        ).limit(limit).all()
+        # Amigos de amigos y, después, los usuarios con más seguidores
+        suggestions = get_suggestions(db, current_user.id, limit)
         
         # Convertir a formato de respuesta de follower
         follower_responses = []
@@ -217,13 +245,15 @@ async def get_follow_suggestions(
                 follower_id=current_user.id,
                 following_id=user.id,
                 created_at=user.created_at,
-                follower=current_user,
+                follower=current_user.user,  # perfil desde la caché de usuarios
                 following=user
             )
             follower_responses.append(follower_response)
         
         return follower_responses
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener sugerencias: {str(e)}")
 
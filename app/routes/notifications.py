@@ -1,70 +1,168 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, load_only
+from typing import List, Optional, Union
+import asyncio
+import json
+from datetime import datetime
 
 from app.database import get_db
 from app.models.notification import Notification
 from app.models.user import User
 from app.schemas.notification import NotificationResponse, NotificationStats
 from app.schemas.user import UserResponse
-from app.utils.security import get_current_user
+from app.schemas.pagination import CursorPage
+from app.utils.security import (
+    get_current_principal, get_current_writer, get_stream_user_id, Principal, create_stream_token
+)
+from app.utils.pagination import CursorParams, decode_cursor, older_than
+from app.utils import notification_counts
+from app.config import settings
+from app.utils import pubsub
+from app.utils.fanout import pull_new_tracks
+from app.utils.loaders import USER_RESPONSE_COLUMNS, notification_response_options
 
 
 router = APIRouter(prefix="/notifications", tags=["notificaciones"])
 
-@router.get("/", response_model=List[NotificationResponse])
-async def get_notifications(
+def load_sample_senders(db: Session, notifications: List[Notification]) -> dict:
+    """
+    🎯 Cargar los remitentes de muestra de las notificaciones agrupadas en una sola consulta (IN)
+    """
+    senders_by_id = {n.sender.id: n.sender for n in notifications if n.sender}
+    missing = {
+        uid for n in notifications for uid in (n.sender_sample or []) if uid not in senders_by_id
+    }
+    if missing:
+        users = db.query(User).options(load_only(*USER_RESPONSE_COLUMNS)).filter(User.id.in_(missing)).all()
+        senders_by_id.update({user.id: user for user in users})
+    return senders_by_id
+
+def build_notification_response(notification: Notification, senders_by_id: Optional[dict] = None) -> NotificationResponse:
+    """
+    🎯 Construir la respuesta de una notificación con el remitente ya cargado
+    """
+    sender_user = notification.sender
+    senders_by_id = senders_by_id or {}
+    if sender_user:
+        senders_by_id.setdefault(sender_user.id, sender_user)
+    sample = notification.sender_sample or [notification.from_user_id]
+    return NotificationResponse(
+        id=notification.id,
+        user_id=notification.user_id,
+        from_user_id=notification.from_user_id,
+        type=notification.type,
+        target_id=notification.target_id,
+        is_read=notification.is_read,
+        created_at=notification.created_at,
+        last_activity_at=notification.last_activity_at,
+        message=notification.get_message(),
+        icon=notification.get_icon(),
+        sender=UserResponse.model_validate(sender_user) if sender_user else None,
+        actor_count=notification.actor_count or 1,
+        senders=[UserResponse.model_validate(senders_by_id[uid]) for uid in sample if uid in senders_by_id]
+    )
+
+@router.get("/", response_model=Union[List[NotificationResponse], CursorPage[NotificationResponse]])
+def get_notifications(
     skip: int = Query(0, description="Saltar primeros N notificaciones"),
-    limit: int = Query(50, description="Límite de notificaciones a devolver"),
+    limit: int = Query(50, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de notificaciones a devolver"),
     unread_only: bool = Query(False, description="Solo notificaciones no leídas"),
+    page: CursorParams = Depends(),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener notificaciones del usuario - Como revisar tu bandeja de alertas
     """
     try:
-        query = db.query(Notification).filter(Notification.user_id == current_user.id)
+        # Tracks nuevos de artistas con muchos seguidores (fan-out en lectura)
+        pull_new_tracks(db, current_user.id)
+        
+        query = db.query(Notification).options(*notification_response_options()).filter(
+            Notification.user_id == current_user.id
+        )
         
         if unread_only:
             query = query.filter(Notification.is_read == False)
         
-        notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
-        response_notifications = []
-        for notification in notifications:
-            # Obtener el usuario remitente manualmente
-            sender_user = db.query(User).filter(User.id == notification.from_user_id).first()
-            
-            notification_data = {
-                "id": notification.id,
-                "user_id": notification.user_id,
-                "from_user_id": notification.from_user_id,
-                "type": notification.type,
-                "target_id": notification.target_id,
-                "is_read": notification.is_read,
-                "created_at": notification.created_at,
-                "message": notification.get_message(),
-                "icon": notification.get_icon(),
-                "sender": UserResponse.from_orm(sender_user) if sender_user else None
+        if page.enabled:
+            notifications, next_cursor = page.paginate(query, Notification.created_at, Notification.id, limit)
+            senders_by_id = load_sample_senders(db, notifications)
+            return {
+                "items": [build_notification_response(notification, senders_by_id) for notification in notifications],
+                "next_cursor": next_cursor
             }
-            response_notifications.append(notification_data)
-        
-        return response_notifications
+
+        notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+        senders_by_id = load_sample_senders(db, notifications)
+
+        return [build_notification_response(notification, senders_by_id) for notification in notifications]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener notificaciones: {str(e)}")
 
+@router.post("/stream-token")
+def get_stream_token(current_user: Principal = Depends(get_current_principal)):
+    """
+    🎯 Token para abrir el canal push - Como pedir un pase de corta duración
+
+    EventSource no permite cabeceras: este token de corta duración va en
+    `?token=` en lugar del JWT de acceso, que así no queda en los logs de
+    proxies y servidores.
+    """
+    return {
+        "token": create_stream_token(current_user.id),
+        "expires_in": settings.STREAM_TOKEN_TTL_SECONDS
+    }
+
+@router.get("/stream")
+async def stream_notifications(request: Request, user_id: int = Depends(get_stream_user_id)):
+    """
+    🎯 Canal en tiempo real (Server-Sent Events) - Como recibir las alertas al instante
+
+    Se abre con el JWT en la cabecera Authorization o con un token de
+    /notifications/stream-token en `?token=`.
+    No usa la base de datos: cada conexión es una suscripción al pub/sub en memoria.
+    """
+
+    async def event_stream():
+        # Se suscribe al abrir el stream y se da de baja siempre al cerrarlo
+        subscription = pubsub.broker.subscribe(pubsub.user_channel(user_id))
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.PUSH_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # keep-alive para proxies
+                    continue
+                data = json.dumps(message["data"], default=str)
+                yield f"event: {message['event']}\ndata: {data}\n\n"
+        finally:
+            pubsub.broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.put("/{notification_id}/read", response_model=NotificationResponse)
-async def mark_notification_read(
+def mark_notification_read(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Marcar notificación como leída - Como marcar un mensaje como visto
     """
     try:
-        notification = db.query(Notification).filter(
+        notification = db.query(Notification).options(*notification_response_options()).filter(
             Notification.id == notification_id,
             Notification.user_id == current_user.id  # Solo puede marcar sus propias notificaciones
         ).first()
@@ -72,24 +170,16 @@ async def mark_notification_read(
         if not notification:
             raise HTTPException(status_code=404, detail="Notificación no encontrada")
         
+        was_read = notification.is_read
         notification.is_read = True
-        db.commit()
 
-        sender_user = db.query(User).filter(User.id == notification.from_user_id).first()
-        
-        # Construir la respuesta manualmente
-        notification_response = NotificationResponse(
-            id=notification.id,
-            user_id=notification.user_id,
-            from_user_id=notification.from_user_id,
-            type=notification.type,
-            target_id=notification.target_id,
-            is_read=notification.is_read,
-            created_at=notification.created_at,
-            message=notification.get_message(),
-            icon=notification.get_icon(),
-            sender=UserResponse.from_orm(sender_user) if sender_user else None
+        # Construir la respuesta antes del commit para no recargar el remitente
+        notification_response = build_notification_response(
+            notification, load_sample_senders(db, [notification])
         )
+        db.commit()
+        if not was_read:
+            notification_counts.notifications_read(current_user.id)
         
         return notification_response
         
@@ -100,67 +190,91 @@ async def mark_notification_read(
         raise HTTPException(status_code=500, detail=f"Error al marcar notificación: {str(e)}")
 
 @router.put("/read-all", response_model=dict)
-async def mark_all_notifications_read(
+def mark_all_notifications_read(
+    cursor: Optional[str] = Query(None, description="Marcar hasta esta notificación (cursor), incluida"),
+    before: Optional[datetime] = Query(None, description="Marcar las creadas hasta esta fecha, incluida"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Marcar todas las notificaciones como leídas - Como limpiar toda la bandeja
     """
     try:
-        # Obtener todas las notificaciones no leídas del usuario
-        unread_notifications = db.query(Notification).filter(
+        # Un único UPDATE sobre las no leídas (usa el índice parcial de no leídas)
+        query = db.query(Notification).filter(
             Notification.user_id == current_user.id,
             Notification.is_read == False
-        ).all()
+        )
         
-        # Marcar todas como leídas
-        for notification in unread_notifications:
-            notification.mark_as_read()
+        # Confirmar por lotes: solo hasta el cursor o la fecha indicados
+        if cursor:
+            created_at, notification_id = decode_cursor(cursor)
+            query = query.filter(older_than(
+                db, Notification.created_at, Notification.id, created_at, notification_id, inclusive=True
+            ))
+        if before:
+            query = query.filter(Notification.created_at <= before)
         
+        updated = query.update({Notification.is_read: True}, synchronize_session=False)
         db.commit()
+        notification_counts.notifications_read(current_user.id, updated)
         
         return {
             "message": f"Todas las notificaciones marcadas como leídas",
-            "notifications_updated": len(unread_notifications)
+            "notifications_updated": updated
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al marcar notificaciones: {str(e)}")
 
 @router.get("/stats", response_model=NotificationStats)
-async def get_notification_stats(
+def get_notification_stats(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener estadísticas de notificaciones - Como ver tu resumen de alertas
+
+    Los contadores se sirven desde caché y con ETag: si el cliente envía
+    If-None-Match y no han cambiado, se responde 304. Antes se recogen los
+    tracks nuevos de artistas grandes (pull), como mucho cada
+    NOTIFICATION_PULL_INTERVAL segundos, para que el badge y el canal push
+    no esperen a que se abra la bandeja.
     """
     try:
-        total_count = db.query(Notification).filter(
-            Notification.user_id == current_user.id
-        ).count()
+        pull_new_tracks(db, current_user.id, throttled=True)
         
-        unread_count = db.query(Notification).filter(
-            Notification.user_id == current_user.id,
-            Notification.is_read == False
-        ).count()
+        counts = notification_counts.cached_counts(current_user.id)
+        if counts and if_none_match == notification_counts.counts_etag(current_user.id, counts):
+            return Response(status_code=304, headers={"ETag": if_none_match})
+        
+        if counts is None:
+            counts = notification_counts.get_counts(db, current_user.id)
+        
+        etag = notification_counts.counts_etag(current_user.id, counts)
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         
         return NotificationStats(
             user_id=current_user.id,
-            unread_count=unread_count,
-            total_count=total_count
+            unread_count=counts["unread"],
+            total_count=counts["total"]
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas: {str(e)}")
 
 @router.delete("/{notification_id}")
-async def delete_notification(
+def delete_notification(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Eliminar notificación - Como quitar una alerta de tu bandeja
@@ -174,8 +288,10 @@ async def delete_notification(
         if not notification:
             raise HTTPException(status_code=404, detail="Notificación no encontrada")
         
+        was_read = notification.is_read
         db.delete(notification)
         db.commit()
+        notification_counts.notification_deleted(current_user.id, was_read)
         
         return {"message": "Notificación eliminada correctamente"}
         
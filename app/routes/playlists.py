@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from app.database import get_db
 from app.models.playlist import Playlist
@@ -11,22 +11,28 @@ from app.schemas.playlist import (
     PlaylistCreate, PlaylistUpdate, PlaylistResponse,
     PlaylistTrackCreate, PlaylistTrackResponse
 )
-from app.utils.security import get_current_user
+from app.schemas.pagination import CursorPage
+from app.utils.security import get_current_principal, get_current_writer, Principal
+from app.utils.pagination import CursorParams
+from app.utils.playlist_reader import build_playlist_response, playlist_query
+from app.config import settings
 
 router = APIRouter(prefix="/playlists", tags=["playlists"])
 
-@router.get("/", response_model=List[PlaylistResponse])
-async def get_playlists(
+@router.get("/", response_model=Union[List[PlaylistResponse], CursorPage[PlaylistResponse]])
+def get_playlists(
     skip: int = Query(0, description="Saltar primeros N playlists"),
-    limit: int = Query(50, description="Límite de playlists a devolver"),
+    limit: int = Query(50, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de playlists a devolver"),
     user_id: Optional[int] = Query(None, description="Filtrar por usuario"),
     only_public: bool = Query(True, description="Solo playlists públicas"),
+    detail: bool = Query(False, description="Incluir las canciones de cada playlist"),
+    page: CursorParams = Depends(),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """🎯 Obtener lista de playlists"""
     try:
-        query = db.query(Playlist)
+        query = playlist_query(db, detail)
         
         if only_public:
             query = query.filter(Playlist.is_public == True)
@@ -34,17 +40,47 @@ async def get_playlists(
         if user_id:
             query = query.filter(Playlist.user_id == user_id)
         
-        playlists = query.order_by(Playlist.created_at.desc()).offset(skip).limit(limit).all()
-        return playlists
+        if page.enabled:
+            rows, next_cursor = page.paginate(query, Playlist.created_at, Playlist.id, limit)
+            return {"items": [build_playlist_response(row, detail) for row in rows], "next_cursor": next_cursor}
+
+        rows = query.order_by(Playlist.created_at.desc()).offset(skip).limit(limit).all()
+        return [build_playlist_response(row, detail) for row in rows]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener playlists: {str(e)}")
 
+@router.get("/{playlist_id}", response_model=PlaylistResponse)
+def get_playlist(
+    playlist_id: int,
+    detail: bool = Query(True, description="Incluir las canciones de la playlist"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """🎯 Obtener una playlist con sus canciones"""
+    try:
+        row = playlist_query(db, detail).filter(Playlist.id == playlist_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Playlist no encontrada")
+        
+        playlist = row[0]
+        if not playlist.is_public and playlist.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="No tienes permisos para ver esta playlist")
+        
+        return build_playlist_response(row, detail)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener playlist: {str(e)}")
+
 @router.post("/", response_model=PlaylistResponse)
-async def create_playlist(
+def create_playlist(
     playlist_data: PlaylistCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """🎯 Crear nueva playlist"""
     try:
@@ -67,11 +103,11 @@ async def create_playlist(
         raise HTTPException(status_code=500, detail=f"Error al crear playlist: {str(e)}")
 
 @router.post("/{playlist_id}/tracks", response_model=PlaylistTrackResponse)
-async def add_track_to_playlist(
+def add_track_to_playlist(
     playlist_id: int,
     track_data: PlaylistTrackCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """🎯 Agregar track a playlist"""
     try:
@@ -109,10 +145,10 @@ async def add_track_to_playlist(
     
 
 @router.delete("/{playlist_id}",response_model=None)
-async def delete_playlist(
+def delete_playlist(
     playlist_id : int,
     db: Session= Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     
     try:
@@ -136,11 +172,11 @@ async def delete_playlist(
         raise HTTPException(status_code=500, detail=f"Error al eliminar el track: {str(e)}")
     
 @router.put("/{playlist_id}",response_model=PlaylistUpdate)
-async def update_playlist(
+def update_playlist(
     playlist_data : PlaylistUpdate,
     playlist_id : int,
     db: Session= Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     try:
 
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.schemas.track import TrackResponse
+from app.utils.security import get_current_principal, Principal
+from app.utils.recommender import recommend_for_user
+from app.utils.trending import get_trending
+
+router = APIRouter(prefix="/me", tags=["recomendaciones"])
+
+@router.get("/recommendations", response_model=List[TrackResponse])
+def get_my_recommendations(
+    limit: int = Query(20, ge=1, le=100, description="Límite de tracks a devolver"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    🎯 Recomendaciones personales - Tracks parecidos a los que te gustan
+    
+    Sin likes suficientes todavía, se devuelven los tracks en tendencia.
+    """
+    try:
+        tracks = recommend_for_user(db, current_user.id, limit)
+        if not tracks:
+            return get_trending(db, None, limit)
+        return tracks
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener recomendaciones: {str(e)}")
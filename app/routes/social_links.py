@@ -11,7 +11,7 @@ from app.utils.security import get_current_user
 router = APIRouter(prefix="/social-links", tags=["redes-sociales"])
 
 @router.get("/user/{user_id}", response_model=List[SocialLinkResponse])
-async def get_user_social_links(
+def get_user_social_links(
     user_id: int,
     db: Session = Depends(get_db)
 ):
@@ -32,7 +32,7 @@ async def get_user_social_links(
         raise HTTPException(status_code=500, detail=f"Error al obtener enlaces sociales: {str(e)}")
 
 @router.post("/", response_model=SocialLinkResponse)
-async def create_social_link(
+def create_social_link(
     social_data: SocialLinkCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -69,7 +69,7 @@ async def create_social_link(
         raise HTTPException(status_code=500, detail=f"Error al crear enlace social: {str(e)}")
 
 @router.put("/{social_link_id}", response_model=SocialLinkResponse)
-async def update_social_link(
+def update_social_link(
     social_link_id: int,
     social_data: SocialLinkUpdate,
     db: Session = Depends(get_db),
@@ -103,7 +103,7 @@ async def update_social_link(
         raise HTTPException(status_code=500, detail=f"Error al actualizar enlace social: {str(e)}")
 
 @router.delete("/{social_link_id}")
-async def delete_social_link(
+def delete_social_link(
     social_link_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
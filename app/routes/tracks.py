@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from app.database import get_db
 from app.models.track import Track
@@ -9,27 +10,52 @@ from app.models.like import Like
 from app.models.comment import Comment
 from app.schemas.track import TrackCreate, TrackUpdate, TrackResponse
 from app.schemas.like import LikeResponse, LikeStats
-from app.schemas.comment import CommentResponse, CommentStats
-from app.utils.security import get_current_user
+from app.schemas.comment import CommentStats, CommentTimeline, CommentTreeNode
+from app.schemas.pagination import BatchResult, CursorPage
+from app.utils.security import get_current_principal, get_current_writer, Principal
+from app.utils.pagination import CursorParams
+from app.utils.search import search_tracks
+from app.utils.counters import bump_user, bump_track
+from app.utils.fanout import fanout
+from app.utils import feed
+from app.utils.play_counter import play_counter
+from app.utils.trending import get_trending, trending
+from app.utils.recommender import recommender as track_recommender, remove_similarities, similar_tracks
+from app.utils.loaders import comment_response_options, track_response_options
+from app.utils.comment_threads import build_thread
+from app.utils.comment_timeline import comments_in_window, get_histogram
+from app.utils.batch import fetch_batch, parse_ids
+from app.utils.discovery import apply_discovery_filters, bpm_ranges, order_by_tempo, parse_genres
+from app.config import settings
 
 router = APIRouter(prefix="/tracks", tags=["pistas"])
 
-@router.get("/", response_model=List[TrackResponse])
-async def get_tracks(
+@router.get("/", response_model=Union[List[TrackResponse], CursorPage[TrackResponse], BatchResult[TrackResponse]])
+def get_tracks(
+    ids: Optional[List[str]] = Query(None, description="Leer varios tracks por id (1,2,3), en ese orden"),
     skip: int = Query(0, description="Saltar primeros N tracks"),
-    limit: int = Query(50, description="Límite de tracks a devolver"),
+    limit: int = Query(50, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de tracks a devolver"),
     genre: Optional[str] = Query(None, description="Filtrar por género"),
     user_id: Optional[int] = Query(None, description="Filtrar por usuario"),
     search: Optional[str] = Query(None, description="Buscar por título o descripción"),
+    page: CursorParams = Depends(),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener lista de tracks - Como navegar por el catálogo musical
     """
     try:
+        if ids is not None:
+            # Lectura por lotes: una consulta, sin contar reproducciones.
+            # Los privados ajenos se marcan como no encontrados
+            query = db.query(Track).options(*track_response_options()).filter(
+                or_(Track.is_public == True, Track.user_id == current_user.id)
+            )
+            return fetch_batch(query, Track, parse_ids(ids), TrackResponse)
+
         # Construir query base - solo tracks públicos
-        query = db.query(Track).filter(Track.is_public == True)
+        query = db.query(Track).options(*track_response_options()).filter(Track.is_public == True)
         
         # Aplicar filtros
         if genre:
@@ -39,21 +65,75 @@ async def get_tracks(
             query = query.filter(Track.user_id == user_id)
         
         if search:
-            query = query.filter(
-                (Track.title.ilike(f"%{search}%")) | 
-                (Track.description.ilike(f"%{search}%"))
-            )
+            # Índice de texto completo; por relevancia salvo en modo cursor
+            query = search_tracks(query, search, rank=not page.enabled)
         
+        if page.enabled:
+            tracks, next_cursor = page.paginate(query, Track.created_at, Track.id, limit)
+            return {"items": tracks, "next_cursor": next_cursor}
+
         # Ordenar por más recientes primero
         tracks = query.order_by(Track.created_at.desc()).offset(skip).limit(limit).all()
         
         return tracks
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener tracks: {str(e)}")
 
+@router.get("/trending", response_model=List[TrackResponse])
+def get_trending_tracks(
+    genre: Optional[str] = Query(None, description="Tendencias de un género"),
+    limit: int = Query(50, ge=1, le=settings.TRENDING_TOP_N, description="Límite de tracks a devolver"),
+    db: Session = Depends(get_db)
+):
+    """
+    🎯 Tracks en tendencia - Lo que más se está escuchando, gustando y comentando ahora
+    """
+    try:
+        return get_trending(db, genre, limit)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener tendencias: {str(e)}")
+
+@router.get("/discover", response_model=List[TrackResponse])
+def discover_tracks(
+    genre: Optional[List[str]] = Query(None, description="Géneros exactos (repetible o separados por comas)"),
+    bpm: Optional[float] = Query(None, gt=0, description="BPM objetivo para mezclar"),
+    tolerance: float = Query(settings.DISCOVER_BPM_TOLERANCE, ge=0, le=50, description="Tolerancia armónica en % sobre el BPM objetivo"),
+    half_double: bool = Query(False, description="Aceptar también la mitad y el doble del BPM objetivo"),
+    bpm_min: Optional[int] = Query(None, ge=0, description="BPM mínimo (sin BPM objetivo)"),
+    bpm_max: Optional[int] = Query(None, ge=0, description="BPM máximo (sin BPM objetivo)"),
+    duration_min: Optional[int] = Query(None, ge=0, description="Duración mínima en segundos"),
+    duration_max: Optional[int] = Query(None, ge=0, description="Duración máxima en segundos"),
+    skip: int = Query(0, ge=0, description="Saltar primeros N tracks"),
+    limit: int = Query(50, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de tracks a devolver"),
+    db: Session = Depends(get_db)
+):
+    """
+    🎯 Descubrir tracks para mezclar - Por géneros, tempo compatible y duración
+    """
+    try:
+        if bpm is not None and (bpm_min is not None or bpm_max is not None):
+            raise HTTPException(status_code=400, detail="Usa bpm (con tolerance) o bpm_min/bpm_max, no ambos")
+        if bpm_min is not None and bpm_max is not None and bpm_min > bpm_max:
+            raise HTTPException(status_code=400, detail="bpm_min no puede ser mayor que bpm_max")
+        if duration_min is not None and duration_max is not None and duration_min > duration_max:
+            raise HTTPException(status_code=400, detail="duration_min no puede ser mayor que duration_max")
+
+        ranges = bpm_ranges(bpm, tolerance, half_double, bpm_min, bpm_max)
+        query = db.query(Track).options(*track_response_options())
+        query = apply_discovery_filters(query, parse_genres(genre), ranges, duration_min, duration_max)
+        return order_by_tempo(query, bpm).offset(skip).limit(limit).all()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al descubrir tracks: {str(e)}")
+
 @router.get("/{track_id}", response_model=TrackResponse)
-async def get_track(
+def get_track(
     track_id: int,
     db: Session = Depends(get_db)
 ):
@@ -61,14 +141,14 @@ async def get_track(
     🎯 Obtener track específico - Como escuchar una canción individual
     """
     try:
-        track = db.query(Track).filter(Track.id == track_id).first()
+        track = db.query(Track).options(*track_response_options()).filter(Track.id == track_id).first()
         
         if not track:
             raise HTTPException(status_code=404, detail="Track no encontrado")
         
-        # Incrementar contador de reproducciones
-        track.play_count += 1
-        db.commit()
+        # Registrar la reproducción (se vuelca a la BD en lote, sin commit aquí)
+        play_counter.increment(track_id)
+        trending.record(track_id, settings.TRENDING_PLAY_WEIGHT)
         
         return track
         
@@ -78,10 +158,10 @@ async def get_track(
         raise HTTPException(status_code=500, detail=f"Error al obtener track: {str(e)}")
 
 @router.post("/", response_model=TrackResponse, status_code=status.HTTP_201_CREATED)
-async def create_track(
+def create_track(
     track_data: TrackCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Crear nuevo track - Como subir tu propia música a la plataforma
@@ -100,9 +180,15 @@ async def create_track(
         )
         
         db.add(new_track)
+        if new_track.is_public:
+            bump_user(db, current_user.id, track_count=1)
         db.commit()
         db.refresh(new_track)
         
+        # Notificar a los seguidores y añadirlo a sus feeds en segundo plano
+        if new_track.is_public:
+            fanout.enqueue(new_track.id, current_user.id)
+        
         return new_track
         
     except Exception as e:
@@ -110,11 +196,11 @@ async def create_track(
         raise HTTPException(status_code=500, detail=f"Error al crear track: {str(e)}")
 
 @router.put("/{track_id}", response_model=TrackResponse)
-async def update_track(
+def update_track(
     track_id: int,
     track_data: TrackUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Actualizar track - Como editar los detalles de tu canción
@@ -130,13 +216,25 @@ async def update_track(
             raise HTTPException(status_code=403, detail="No tienes permisos para editar este track")
         
         # Actualizar campos permitidos
+        was_public = track.is_public
         update_data = track_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(track, field, value)
         
+        # Si cambia la visibilidad, mover el track en los contadores del artista
+        if track.is_public != was_public:
+            sign = 1 if track.is_public else -1
+            bump_user(db, track.user_id, track_count=sign, total_plays=sign * (track.play_count or 0))
+            if not track.is_public:
+                feed.remove_track(db, track.id)
+        
         db.commit()
         db.refresh(track)
         
+        # Un track que pasa a público entra en los feeds (sin volver a notificar)
+        if track.is_public and not was_public:
+            fanout.enqueue(track.id, track.user_id, notify=False)
+        
         return track
         
     except HTTPException:
@@ -146,10 +244,10 @@ async def update_track(
         raise HTTPException(status_code=500, detail=f"Error al actualizar track: {str(e)}")
 
 @router.delete("/{track_id}")
-async def delete_track(
+def delete_track(
     track_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Eliminar track - Como quitar tu música de la plataforma
@@ -164,6 +262,10 @@ async def delete_track(
         if track.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="No tienes permisos para eliminar este track")
         
+        if track.is_public:
+            bump_user(db, track.user_id, track_count=-1, total_plays=-(track.play_count or 0))
+        feed.remove_track(db, track.id)
+        remove_similarities(db, [track.id])
         db.delete(track)
         db.commit()
         
@@ -176,10 +278,10 @@ async def delete_track(
         raise HTTPException(status_code=500, detail=f"Error al eliminar track: {str(e)}")
 
 @router.post("/{track_id}/like", response_model=None)
-async def toggle_like(
+def toggle_like(
     track_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Dar/quitar like a un track - Como mostrar aprecio por una canción
@@ -199,15 +301,19 @@ async def toggle_like(
         if existing_like:
             # Quitar like
             db.delete(existing_like)
+            bump_track(db, track_id, like_count=-1)
             action = "removed"
         else:
             # Dar like
             new_like = Like(user_id=current_user.id, track_id=track_id)
             db.add(new_like)
+            bump_track(db, track_id, like_count=1)
             existing_like = new_like
             action = "added"
         
         db.commit()
+        trending.record(track_id, settings.TRENDING_LIKE_WEIGHT if action == "added" else -settings.TRENDING_LIKE_WEIGHT)
+        track_recommender.mark_dirty(track_id)
         
         if action == "added":
             db.refresh(existing_like)
@@ -221,11 +327,32 @@ async def toggle_like(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al gestionar like: {str(e)}")
 
+@router.get("/{track_id}/similar", response_model=List[TrackResponse])
+def get_similar_tracks(
+    track_id: int,
+    limit: int = Query(10, ge=1, le=settings.RECOMMENDER_TOP_K, description="Límite de tracks a devolver"),
+    db: Session = Depends(get_db)
+):
+    """
+    🎯 Tracks parecidos - A quien le gustó este track también le gustaron...
+    """
+    try:
+        track = db.query(Track.id).filter(Track.id == track_id).first()
+        if not track:
+            raise HTTPException(status_code=404, detail="Track no encontrado")
+        
+        return similar_tracks(db, track_id, limit)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener tracks parecidos: {str(e)}")
+
 @router.get("/{track_id}/likes", response_model=LikeStats)
-async def get_track_likes(
+def get_track_likes(
     track_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener estadísticas de likes de un track
@@ -235,7 +362,8 @@ async def get_track_likes(
         if not track:
             raise HTTPException(status_code=404, detail="Track no encontrado")
         
-        like_count = db.query(Like).filter(Like.track_id == track_id).count()
+        # Contador desnormalizado (sin COUNT)
+        like_count = track.like_count
         
         # Verificar si el usuario actual le dio like
         user_liked = db.query(Like).filter(
@@ -254,11 +382,14 @@ async def get_track_likes(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener likes: {str(e)}")
 
-@router.get("/{track_id}/comments", response_model=List[CommentResponse])
-async def get_track_comments(
+@router.get("/{track_id}/comments", response_model=Union[List[CommentTreeNode], CursorPage[CommentTreeNode]])
+def get_track_comments(
     track_id: int,
     skip: int = Query(0, description="Saltar primeros N comentarios"),
-    limit: int = Query(100, description="Límite de comentarios a devolver"),
+    limit: int = Query(100, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de comentarios a devolver"),
+    tree: bool = Query(False, description="Incluir las respuestas anidadas de cada comentario"),
+    depth: Optional[int] = Query(None, ge=1, description="Niveles de respuestas a incluir con tree=true"),
+    page: CursorParams = Depends(),
     db: Session = Depends(get_db)
 ):
     """
@@ -270,14 +401,59 @@ async def get_track_comments(
             raise HTTPException(status_code=404, detail="Track no encontrado")
         
         # Obtener comentarios principales (no respuestas)
-        comments = db.query(Comment).filter(
+        query = db.query(Comment).options(*comment_response_options()).filter(
             Comment.track_id == track_id,
             Comment.parent_comment_id == None  # Solo comentarios principales
-        ).order_by(Comment.created_at.desc()).offset(skip).limit(limit).all()
+        )
+
+        if page.enabled:
+            comments, next_cursor = page.paginate(query, Comment.created_at, Comment.id, limit)
+            return {"items": build_thread(db, comments, tree, depth), "next_cursor": next_cursor}
+
+        comments = query.order_by(Comment.created_at.desc()).offset(skip).limit(limit).all()
+        
+        return build_thread(db, comments, tree, depth)
         
-        return comments
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener comentarios: {str(e)}")
+
+@router.get("/{track_id}/timeline", response_model=CommentTimeline)
+def get_track_timeline(
+    track_id: int,
+    bucket: int = Query(settings.COMMENT_TIMELINE_BUCKET, ge=1, description="Tamaño de cada tramo del histograma (segundos)"),
+    start: Optional[int] = Query(None, alias="from", ge=0, description="Devolver comentarios desde este segundo"),
+    end: Optional[int] = Query(None, alias="to", ge=0, description="Devolver comentarios hasta este segundo"),
+    limit: int = Query(settings.COMMENT_TIMELINE_MAX_COMMENTS, ge=1, le=settings.COMMENT_TIMELINE_MAX_COMMENTS,
+                       description="Límite de comentarios de la ventana"),
+    db: Session = Depends(get_db)
+):
+    """
+    🎯 Línea de tiempo de comentarios - Como los marcadores sobre la onda en SoundCloud
+
+    Siempre devuelve el histograma; los comentarios solo si se pide una ventana (from/to).
+    """
+    try:
+        track = db.query(Track.id).filter(Track.id == track_id).first()
+        if not track:
+            raise HTTPException(status_code=404, detail="Track no encontrado")
+        
+        if start is not None and end is not None and start > end:
+            raise HTTPException(status_code=400, detail="'from' no puede ser mayor que 'to'")
+        
+        comments = []
+        if start is not None or end is not None:
+            comments = build_thread(db, comments_in_window(db, track_id, start, end, limit))
+        
+        return CommentTimeline(
+            track_id=track_id,
+            bucket_seconds=bucket,
+            histogram=get_histogram(db, track_id, bucket),
+            comments=comments
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener comentarios: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error al obtener la línea de tiempo: {str(e)}")
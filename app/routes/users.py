@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from app.database import get_db
 from app.models.user import User
@@ -9,41 +10,60 @@ from app.models.follower import Follower
 from app.schemas.user import UserResponse
 from app.schemas.track import TrackResponse
 from app.schemas.follower import FollowerResponse, FollowerStats
-from app.utils.security import get_current_user
+from app.schemas.pagination import BatchResult, CursorPage
+from app.utils.security import get_current_principal, get_current_writer, Principal, invalidate_user
+from app.utils.pagination import CursorParams
+from app.utils.search import search_users
+from app.utils.counters import release_user_counters
+from app.utils import feed
+from app.utils.recommender import remove_similarities
+from app.utils.loaders import track_response_options
+from app.utils.batch import fetch_batch, parse_ids
+from app.config import settings
 
 router = APIRouter(prefix="/users", tags=["usuarios"])
 
-@router.get("/", response_model=List[UserResponse])
-async def get_users(
+@router.get("/", response_model=Union[List[UserResponse], CursorPage[UserResponse], BatchResult[UserResponse]])
+def get_users(
+    ids: Optional[List[str]] = Query(None, description="Leer varios usuarios por id (1,2,3), en ese orden"),
     skip: int = Query(0, description="Saltar primeros N usuarios"),
-    limit: int = Query(100, description="Límite de usuarios a devolver"),
+    limit: int = Query(100, ge=1, le=settings.PAGE_MAX_LIMIT, description="Límite de usuarios a devolver"),
     search: Optional[str] = Query(None, description="Buscar por username o display_name"),
+    page: CursorParams = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     🎯 Obtener lista de usuarios - Como navegar por el directorio de artistas
     """
     try:
+        if ids is not None:
+            # Lectura por lotes: una consulta, en el orden pedido
+            return fetch_batch(db.query(User), User, parse_ids(ids), UserResponse)
+
         # Construir query base
         query = db.query(User)
         
         # Aplicar filtro de búsqueda si existe
         if search:
-            query = query.filter(
-                (User.username.ilike(f"%{search}%")) | 
-                (User.display_name.ilike(f"%{search}%"))
-            )
+            # Índice de texto completo; por relevancia salvo en modo cursor
+            query = search_users(query, search, rank=not page.enabled)
         
+        if page.enabled:
+            users, next_cursor = page.paginate(query, User.created_at, User.id, limit)
+            return {"items": users, "next_cursor": next_cursor}
+
         # Obtener usuarios paginados
         users = query.offset(skip).limit(limit).all()
         
         return users
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener usuarios: {str(e)}")
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(
+def get_user(
     user_id: int,
     db: Session = Depends(get_db)
 ):
@@ -65,15 +85,17 @@ async def get_user(
     
 
 @router.put("/profile", response_model=UserResponse)
-async def update_profile(
+def update_profile(
     user_data: dict,  # Usaremos dict para flexibilidad
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    principal: Principal = Depends(get_current_writer)
 ):
     """
     🎯 Actualizar perfil de usuario - Como editar tu información personal
     """
     try:
+        current_user = principal.user
+        
         # Campos permitidos para actualizar
         allowed_fields = ['display_name', 'bio', 'avatar_url', 'location', 'website_url']
         
@@ -85,6 +107,7 @@ async def update_profile(
             setattr(current_user, field, value)
         
         db.commit()
+        invalidate_user(current_user.id)
         db.refresh(current_user)
         
         return current_user
@@ -95,13 +118,13 @@ async def update_profile(
     
 
 @router.get("/{user_id}/tracks", response_model=List[TrackResponse])
-async def get_user_tracks(
+def get_user_tracks(
     user_id: int,
     skip: int = Query(0, description="Saltar primeros N tracks"),
     limit: int = Query(50, description="Límite de tracks a devolver"),
     only_public: bool = Query(True, description="Solo tracks públicos"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     🎯 Obtener tracks de un usuario - Como ver la discografía de un artista
@@ -113,7 +136,7 @@ async def get_user_tracks(
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
         # Construir query
-        query = db.query(Track).filter(Track.user_id == user_id)
+        query = db.query(Track).options(*track_response_options()).filter(Track.user_id == user_id)
         
         # Filtrar por visibilidad
         if only_public:
@@ -131,7 +154,7 @@ async def get_user_tracks(
         raise HTTPException(status_code=500, detail=f"Error al obtener tracks: {str(e)}")
 
 @router.get("/{user_id}/followers", response_model=List[FollowerResponse])
-async def get_user_followers(
+def get_user_followers(
     user_id: int,
     db: Session = Depends(get_db)
 ):
@@ -152,7 +175,7 @@ async def get_user_followers(
         raise HTTPException(status_code=500, detail=f"Error al obtener seguidores: {str(e)}")
 
 @router.get("/{user_id}/following", response_model=List[FollowerResponse])
-async def get_user_following(
+def get_user_following(
     user_id: int,
     db: Session = Depends(get_db)
 ):
@@ -173,7 +196,7 @@ async def get_user_following(
         raise HTTPException(status_code=500, detail=f"Error al obtener seguidos: {str(e)}")
 
 @router.get("/{user_id}/stats")
-async def get_user_stats(
+def get_user_stats(
     user_id: int,
     db: Session = Depends(get_db)
 ):
@@ -185,24 +208,20 @@ async def get_user_stats(
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
-        # Contar seguidores
-        follower_count = db.query(Follower).filter(Follower.following_id == user_id).count()
-        
-        # Contar seguidos
-        following_count = db.query(Follower).filter(Follower.follower_id == user_id).count()
-        
-        # Contar tracks públicos
-        track_count = db.query(Track).filter(
-            Track.user_id == user_id, 
+        # Likes recibidos: suma de tracks.like_count de sus tracks públicos
+        total_likes = db.query(func.coalesce(func.sum(Track.like_count), 0)).filter(
+            Track.user_id == user_id,
             Track.is_public == True
-        ).count()
+        ).scalar()
         
+        # Resto de contadores desnormalizados: leídos de la propia fila del usuario
         return {
             "user_id": user_id,
-            "follower_count": follower_count,
-            "following_count": following_count,
-            "track_count": track_count,
-            "total_likes": sum(track.play_count for track in user.tracks if track.is_public)
+            "follower_count": user.follower_count,
+            "following_count": user.following_count,
+            "track_count": user.track_count,
+            "total_likes": total_likes,
+            "total_plays": user.total_plays
         }
         
     except HTTPException:
@@ -213,10 +232,10 @@ async def get_user_stats(
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_writer)
 ):
     """Eliminar usuario (solo admin o propio usuario)"""
     try:
@@ -228,8 +247,12 @@ async def delete_user(
         if current_user.id != user_id:
             raise HTTPException(status_code=403, detail="No tienes permisos")
         
+        release_user_counters(db, user_id)
+        feed.remove_user(db, user_id)
+        remove_similarities(db, select(Track.id).where(Track.user_id == user_id))
         db.delete(user)
         db.commit()
+        invalidate_user(user_id)
         
         return {"message": "Usuario eliminado correctamente"}
         
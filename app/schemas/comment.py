@@ -64,14 +64,20 @@ class CommentResponse(CommentBase):
         # is_reply
         data.is_reply = data.parent_comment_id is not None
         
-        # reply_count (si está disponible)
-        if hasattr(data, 'replies'):
-            data.reply_count = len(data.replies)
-        else:
-            data.reply_count = 0
+        # reply_count: el cargador de hilos lo trae ya calculado (GROUP BY);
+        # si no, se cuentan las respuestas (si están disponibles)
+        if getattr(data, 'reply_count', None) is None:
+            if hasattr(data, 'replies'):
+                data.reply_count = len(data.replies)
+            else:
+                data.reply_count = 0
             
         return data
 
+class CommentTreeNode(CommentResponse):
+    """Comentario con sus respuestas anidadas (árbol cargado de una vez)"""
+    children: List['CommentTreeNode'] = []  # Respuestas cargadas (pueden ser menos que reply_count)
+
 class CommentThread(BaseModel):
     """Hilo completo de comentarios con respuestas"""
     comment: CommentResponse
@@ -81,4 +87,17 @@ class CommentStats(BaseModel):
     """Estadísticas de comentarios para un track"""
     track_id: int
     comment_count: int  # Total de comentarios
-    thread_count: int  # Comentarios principales (no respuestas)
\ No newline at end of file
+    thread_count: int  # Comentarios principales (no respuestas)
+
+class TimelineBucket(BaseModel):
+    """Tramo del histograma de comentarios de un track"""
+    start: int  # Segundo inicial (incluido)
+    end: int  # Segundo final (excluido)
+    count: int  # Comentarios con timestamp en el tramo
+
+class CommentTimeline(BaseModel):
+    """Línea de tiempo de comentarios para pintar marcadores sobre la onda"""
+    track_id: int
+    bucket_seconds: int
+    histogram: List[TimelineBucket] = []  # Solo tramos con comentarios
+    comments: List[CommentTreeNode] = []  # Comentarios de la ventana [from, to] pedida
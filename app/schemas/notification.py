@@ -1,5 +1,5 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from app.schemas.user import UserResponse
 
@@ -30,9 +30,12 @@ class NotificationResponse(NotificationBase):
     id: int
     is_read: bool
     created_at: datetime
+    last_activity_at: Optional[datetime] = None  # Último remitente sumado al grupo
     message: str  # Mensaje formateado
     icon: Optional[str]=None  # Emoji del icono
-    sender: UserResponse  # Quién causó la notificación
+    sender: UserResponse  # Quién causó la notificación (el más reciente si está agrupada)
+    actor_count: int = 1  # Cuántos usuarios la generaron ("X y 41 más")
+    senders: List[UserResponse] = []  # Muestra de remitentes del grupo
     
     class Config:
         from_attributes = True
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class CursorPage(BaseModel, Generic[T]):
+    """Página de resultados en modo cursor (keyset)"""
+    items: List[T]
+    next_cursor: Optional[str] = None  # None cuando no hay más páginas
+
+class BatchItem(BaseModel, Generic[T]):
+    """Resultado de un id pedido en una lectura por lotes (?ids=...)"""
+    id: int
+    found: bool
+    item: Optional[T] = None  # None cuando no existe o no es visible
+
+class BatchResult(BaseModel, Generic[T]):
+    """Lectura por lotes: un resultado por id, en el orden en que se pidieron"""
+    items: List[BatchItem[T]]
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, field_validator
 from typing import Optional
 from datetime import datetime
 from app.schemas.user import UserResponse
+from app.utils.genres import normalize_genre
 
 class TrackBase(BaseModel):
     """Datos básicos que TODAS las pistas comparten"""
@@ -13,11 +14,18 @@ class TrackBase(BaseModel):
     bpm: Optional[int] = None
     is_public: bool = True
 
-class TrackCreate(TrackBase):
+class GenreNormalizer(BaseModel):
+    """Normaliza el género de los datos de entrada (crear y actualizar)"""
+    
+    @field_validator('genre', check_fields=False)
+    def clean_genre(cls, v):
+        """Guarda el género en minúsculas y sin espacios sobrantes (búsqueda exacta por índice)"""
+        return normalize_genre(v)
+
+class TrackCreate(GenreNormalizer, TrackBase):
     """Datos para CREAR una nueva pista"""
-    pass
 
-class TrackUpdate(BaseModel):
+class TrackUpdate(GenreNormalizer):
     """Datos para ACTUALIZAR una pista existente"""
     title: Optional[str] = None
     description: Optional[str] = None
@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.schemas.pagination import BatchItem, BatchResult
+
+def parse_ids(values: Optional[List[str]]) -> List[int]:
+    """
+    🎯 Ids pedidos (?ids=1,2,3 o ?ids=1&ids=2), en orden y sin repetir
+
+    Lanza 400 si algún id no es un entero o si se piden más de BATCH_MAX_IDS.
+    """
+    ids = []
+    for value in values or []:
+        for raw in value.split(","):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                item_id = int(raw)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Id no válido: {raw}")
+            if item_id not in ids:
+                ids.append(item_id)
+
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Máximo {settings.BATCH_MAX_IDS} ids por petición")
+    return ids
+
+def fetch_batch(query, model, ids: List[int], response_schema) -> BatchResult:
+    """
+    🎯 Cargar varias entidades por id en una sola consulta (IN) manteniendo el orden pedido
+
+    `query` ya lleva los filtros de visibilidad y las opciones de carga; los
+    ids que no devuelve quedan marcados con found=False.
+    """
+    rows = query.filter(model.id.in_(ids)).all() if ids else []
+    by_id = {row.id: row for row in rows}
+    return BatchResult[response_schema](items=[
+        BatchItem[response_schema](
+            id=item_id,
+            found=item_id in by_id,
+            item=response_schema.model_validate(by_id[item_id]) if item_id in by_id else None
+        )
+        for item_id in ids
+    ])
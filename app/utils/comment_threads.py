@@ -0,0 +1,75 @@
+from collections import defaultdict
+from typing import List
+
+from sqlalchemy import func, literal
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.comment import Comment
+from app.schemas.comment import CommentTreeNode
+from app.utils.loaders import comment_response_options
+
+def reply_counts(db: Session, comment_ids: List[int]) -> dict:
+    """
+    🎯 Número de respuestas directas de cada comentario con un único GROUP BY
+    """
+    if not comment_ids:
+        return {}
+    rows = db.query(Comment.parent_comment_id, func.count(Comment.id)).filter(
+        Comment.parent_comment_id.in_(comment_ids)
+    ).group_by(Comment.parent_comment_id).all()
+    return dict(rows)
+
+def load_reply_tree(db: Session, root_ids: List[int], max_depth: int, max_nodes: int) -> List[Comment]:
+    """
+    🎯 Respuestas de varios comentarios hasta `max_depth` niveles con un CTE recursivo
+
+    Se recorre por niveles (depth, created_at), así que al cortar en
+    `max_nodes` nunca queda una respuesta sin su comentario padre.
+    """
+    if not root_ids or max_depth < 1 or max_nodes < 1:
+        return []
+
+    tree = db.query(
+        Comment.id, literal(1).label("depth")
+    ).filter(Comment.parent_comment_id.in_(root_ids)).cte("reply_tree", recursive=True)
+    tree = tree.union_all(
+        db.query(Comment.id, tree.c.depth + 1).join(
+            tree, Comment.parent_comment_id == tree.c.id
+        ).filter(tree.c.depth < max_depth)
+    )
+
+    return db.query(Comment).options(*comment_response_options()).join(
+        tree, Comment.id == tree.c.id
+    ).order_by(tree.c.depth, Comment.created_at, Comment.id).limit(max_nodes).all()
+
+def build_thread(db: Session, comments: List[Comment], tree: bool = False,
+                 max_depth: int = None, max_nodes: int = None) -> List[CommentTreeNode]:
+    """
+    🎯 Convertir una página de comentarios en respuestas con reply_count y, opcionalmente, el árbol
+
+    Consultas constantes sea cual sea el tamaño de la página: los autores
+    llegan con comment_response_options (un IN), los contadores con un GROUP BY
+    y el árbol (tree=True) con un único CTE recursivo.
+    """
+    replies = []
+    if tree:
+        replies = load_reply_tree(
+            db, [comment.id for comment in comments],
+            min(max_depth or settings.COMMENT_TREE_MAX_DEPTH, settings.COMMENT_TREE_MAX_DEPTH),
+            min(max_nodes or settings.COMMENT_TREE_MAX_NODES, settings.COMMENT_TREE_MAX_NODES),
+        )
+
+    loaded = comments + replies
+    counts = reply_counts(db, [comment.id for comment in loaded])
+    for comment in loaded:
+        comment.reply_count = counts.get(comment.id, 0)
+
+    nodes = {comment.id: CommentTreeNode.model_validate(comment) for comment in loaded}
+    children = defaultdict(list)
+    for reply in replies:
+        children[reply.parent_comment_id].append(nodes[reply.id])
+    for comment_id, node in nodes.items():
+        node.children = children.get(comment_id, [])
+
+    return [nodes[comment.id] for comment in comments]
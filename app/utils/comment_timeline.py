@@ -0,0 +1,72 @@
+import itertools
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.comment import Comment
+from app.utils.cache import TTLCache
+from app.utils.loaders import comment_response_options
+
+# track_id -> (generación, histograma con el tramo por defecto). Al invalidar
+# se guarda una generación nueva sin histograma: un cálculo que empezó antes
+# no puede volver a cachear datos viejos
+timeline_cache = TTLCache(ttl=settings.COMMENT_TIMELINE_CACHE_TTL)
+_generations = itertools.count(1)
+_lock = threading.Lock()
+
+def compute_histogram(db: Session, track_id: int, bucket_seconds: int) -> list:
+    """
+    🎯 Densidad de comentarios por tramos de `bucket_seconds` (un GROUP BY sobre el índice)
+    """
+    bucket = (Comment.timestamp_seconds // bucket_seconds).label("bucket")
+    rows = db.query(bucket, func.count(Comment.id)).filter(
+        Comment.track_id == track_id,
+        Comment.timestamp_seconds != None
+    ).group_by(bucket).order_by(bucket).all()
+    return [
+        {"start": index * bucket_seconds, "end": (index + 1) * bucket_seconds, "count": count}
+        for index, count in rows
+    ]
+
+def get_histogram(db: Session, track_id: int, bucket_seconds: int) -> list:
+    """
+    🎯 Histograma de comentarios de un track
+
+    Solo se cachea el tamaño de tramo por defecto (COMMENT_TIMELINE_BUCKET):
+    los demás se calculan en cada petición y no llenan la memoria.
+    """
+    if bucket_seconds != settings.COMMENT_TIMELINE_BUCKET:
+        return compute_histogram(db, track_id, bucket_seconds)
+
+    generation, histogram = timeline_cache.get(track_id) or (None, None)
+    if histogram is None:
+        histogram = compute_histogram(db, track_id, bucket_seconds)
+        with _lock:
+            # Solo si nadie ha invalidado el track mientras se calculaba
+            current, _ = timeline_cache.get(track_id) or (None, None)
+            if current == generation:
+                timeline_cache.set(track_id, (generation, histogram))
+    return histogram
+
+def comments_in_window(db: Session, track_id: int, start: int, end: int, limit: int) -> list:
+    """
+    🎯 Comentarios con timestamp en [start, end], en el orden en que suenan
+    """
+    query = db.query(Comment).options(*comment_response_options()).filter(
+        Comment.track_id == track_id,
+        Comment.timestamp_seconds != None
+    )
+    if start is not None:
+        query = query.filter(Comment.timestamp_seconds >= start)
+    if end is not None:
+        query = query.filter(Comment.timestamp_seconds <= end)
+    return query.order_by(Comment.timestamp_seconds, Comment.id).limit(limit).all()
+
+def invalidate_timeline(track_id: int):
+    """
+    🎯 Descartar el histograma cacheado de un track (al crear/editar/borrar comentarios)
+    """
+    with _lock:
+        timeline_cache.set(track_id, (next(_generations), None))
@@ -0,0 +1,97 @@
+import asyncio
+
+from anyio import to_thread
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.follower import Follower
+from app.models.like import Like
+from app.models.track import Track
+from app.models.user import User
+
+def _bumped(column, delta: int):
+    """column + delta sin bajar de 0 (un contador desviado no se vuelve negativo)"""
+    if delta >= 0:
+        return column + delta
+    return case((column + delta < 0, 0), else_=column + delta)
+
+def bump_user(db: Session, user_id: int, **deltas):
+    """Suma deltas a los contadores de un usuario con un UPDATE atómico"""
+    db.query(User).filter(User.id == user_id).update(
+        {getattr(User, name): _bumped(getattr(User, name), delta) for name, delta in deltas.items()},
+        synchronize_session=False
+    )
+
+def bump_track(db: Session, track_id: int, **deltas):
+    """Suma deltas a los contadores de un track con un UPDATE atómico"""
+    db.query(Track).filter(Track.id == track_id).update(
+        {getattr(Track, name): _bumped(getattr(Track, name), delta) for name, delta in deltas.items()},
+        synchronize_session=False
+    )
+
+def release_user_counters(db: Session, user_id: int):
+    """
+    Descuenta de otros usuarios y tracks los follows y likes de un usuario
+    que se va a eliminar (el cascade borra esas filas sin tocar los contadores)
+    """
+    followed = select(Follower.following_id).where(Follower.follower_id == user_id)
+    db.query(User).filter(User.id.in_(followed)).update(
+        {User.follower_count: User.follower_count - 1}, synchronize_session=False
+    )
+    followers = select(Follower.follower_id).where(Follower.following_id == user_id)
+    db.query(User).filter(User.id.in_(followers)).update(
+        {User.following_count: User.following_count - 1}, synchronize_session=False
+    )
+    liked = select(Like.track_id).where(Like.user_id == user_id)
+    db.query(Track).filter(Track.id.in_(liked)).update(
+        {Track.like_count: Track.like_count - 1}, synchronize_session=False
+    )
+
+def _reconcile_in_batches(db: Session, model, values: dict, batch_size: int):
+    """UPDATE por rangos de id, con commit por lote (bloqueos cortos)"""
+    low, high = db.query(func.min(model.id), func.max(model.id)).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, batch_size):
+        db.execute(update(model).where(model.id >= start, model.id < start + batch_size).values(**values))
+        db.commit()
+
+def reconcile_counters(db: Session, batch_size: int = None):
+    """
+    🎯 Recalcular todos los contadores desnormalizados a partir de las tablas reales
+
+    Repara cualquier desviación (borrados en cascada, fallos a medias, datos previos).
+    Cada valor se calcula dentro del propio UPDATE (subconsulta correlacionada),
+    no a partir de lecturas previas, y se recorre la tabla por lotes de ids.
+    """
+    batch_size = batch_size or settings.COUNTERS_RECONCILE_BATCH
+    public_tracks = (Track.user_id == User.id) & (Track.is_public == True)
+    _reconcile_in_batches(db, User, {
+        "follower_count": select(func.count(Follower.id)).where(Follower.following_id == User.id).scalar_subquery(),
+        "following_count": select(func.count(Follower.id)).where(Follower.follower_id == User.id).scalar_subquery(),
+        "track_count": select(func.count(Track.id)).where(public_tracks).scalar_subquery(),
+        "total_plays": select(func.coalesce(func.sum(Track.play_count), 0)).where(public_tracks).scalar_subquery(),
+    }, batch_size)
+    _reconcile_in_batches(db, Track, {
+        "like_count": select(func.count(Like.id)).where(Like.track_id == Track.id).scalar_subquery(),
+    }, batch_size)
+
+def _reconcile():
+    if not database.SessionLocal:
+        database.init_engine()
+    db = database.SessionLocal()
+    try:
+        reconcile_counters(db)
+    finally:
+        db.close()
+
+async def run_reconciliation(interval: float):
+    """Bucle de reconciliación periódica (se lanza desde el lifespan de la app)"""
+    while True:
+        try:
+            await to_thread.run_sync(_reconcile)
+        except Exception as e:
+            print(f"❌ Error reconciliando contadores: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,76 @@
+import math
+from typing import List, Optional
+
+from sqlalchemy import and_, func, or_
+
+from app.models.track import Track
+from app.utils.genres import normalize_genre
+
+def parse_genres(values: Optional[List[str]]) -> List[str]:
+    """Géneros pedidos (?genre=a&genre=b o ?genre=a,b), normalizados y sin repetir"""
+    genres = []
+    for value in values or []:
+        for genre in value.split(","):
+            genre = normalize_genre(genre)
+            if genre and genre not in genres:
+                genres.append(genre)
+    return genres
+
+def bpm_ranges(bpm: Optional[float], tolerance: float, half_double: bool = False,
+               bpm_min: Optional[int] = None, bpm_max: Optional[int] = None) -> list:
+    """
+    🎯 Rangos de BPM compatibles para mezclar
+
+    Con un BPM objetivo: ±tolerance % (y, con half_double, también la mitad y
+    el doble del tempo). Si no, el rango [bpm_min, bpm_max] tal cual.
+    """
+    if bpm is None:
+        if bpm_min is None and bpm_max is None:
+            return []
+        return [(bpm_min, bpm_max)]
+
+    targets = [bpm / 2, bpm, bpm * 2] if half_double else [bpm]
+    # Los BPM guardados son enteros: el rango incluye siempre el entero más
+    # cercano al objetivo, aunque un BPM fraccionario con poca tolerancia
+    # quede entre dos enteros
+    return [
+        (min(math.ceil(target * (1 - tolerance / 100)), round(target)),
+         max(math.floor(target * (1 + tolerance / 100)), round(target)))
+        for target in targets
+    ]
+
+def apply_discovery_filters(query, genres: List[str], ranges: list,
+                            duration_min: Optional[int] = None, duration_max: Optional[int] = None):
+    """
+    🎯 Filtros de descubrimiento pensados para los índices (genre, bpm) e (is_public, bpm)
+
+    Igualdad exacta sobre el género normalizado (IN) y rangos cerrados de BPM,
+    de forma que el planificador pueda recorrer el índice por rango.
+    """
+    query = query.filter(Track.is_public == True)
+
+    if genres:
+        query = query.filter(Track.genre.in_(genres))
+
+    conditions = []
+    for low, high in ranges:
+        bounds = []
+        if low is not None:
+            bounds.append(Track.bpm >= low)
+        if high is not None:
+            bounds.append(Track.bpm <= high)
+        conditions.append(and_(*bounds))
+    if conditions:
+        query = query.filter(or_(*conditions))
+
+    if duration_min is not None:
+        query = query.filter(Track.duration_seconds >= duration_min)
+    if duration_max is not None:
+        query = query.filter(Track.duration_seconds <= duration_max)
+    return query
+
+def order_by_tempo(query, bpm: Optional[float]):
+    """Los más cercanos al BPM objetivo primero; sin objetivo, de menor a mayor BPM"""
+    if bpm is None:
+        return query.order_by(Track.bpm, Track.id)
+    return query.order_by(func.abs(Track.bpm - bpm), Track.id)
@@ -0,0 +1,216 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from anyio import to_thread
+from sqlalchemy import and_, exists, insert, literal, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.follower import Follower
+from app.models.notification import Notification
+from app.models.track import Track
+from app.models.user import User
+from app.utils import notification_counts
+from app.utils.cache import TTLCache
+from app.utils.feed import add_to_feeds
+from app.utils.pubsub import publish_to_user
+
+
+class NotificationFanout:
+    """
+    Reparto asíncrono de un track nuevo a los seguidores de un artista
+
+    create_track solo encola el evento; un worker en segundo plano recorre los
+    seguidores por id en lotes e inserta, por cada lote, las notificaciones
+    'new_track' (executemany) y las entradas de su feed (INSERT ... SELECT).
+    Los artistas con `threshold` seguidores o más no se reparten al publicar:
+    cada seguidor los recoge al leer sus notificaciones (pull_new_tracks) y
+    su feed (feed_page).
+    """
+
+    def __init__(self, chunk_size: int, threshold: int):
+        self.chunk_size = chunk_size
+        self.threshold = threshold
+        self._queue = None
+        self._loop = None
+
+    def enqueue(self, track_id: int, artist_id: int, notify: bool = True):
+        """
+        Encola el reparto de un track nuevo (se puede llamar desde cualquier hilo)
+
+        Con notify=False solo se añade a los feeds (p. ej. un track que pasa a público).
+        """
+        if self._loop is None or self._loop.is_closed():
+            # Sin worker (scripts, tests): repartir en el acto
+            self.process(track_id, artist_id, notify)
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (track_id, artist_id, notify))
+
+    def process(self, track_id: int, artist_id: int, notify: bool = True) -> int:
+        """Inserta las notificaciones y entradas de feed del track; devuelve a cuántos seguidores llegó"""
+        if not database.engine:
+            database.init_engine()
+
+        created = 0
+        with database.engine.connect() as conn:
+            follower_count = conn.execute(
+                select(User.follower_count).where(User.id == artist_id)
+            ).scalar()
+            if follower_count is None or follower_count >= self.threshold:
+                return 0
+
+            last_id = 0
+            while True:
+                followers = conn.execute(
+                    select(Follower.id, Follower.follower_id)
+                    .where(Follower.following_id == artist_id, Follower.id > last_id)
+                    .order_by(Follower.id)
+                    .limit(self.chunk_size)
+                ).all()
+                if not followers:
+                    break
+                first_id, last_id = last_id, followers[-1].id
+
+                conn.execute(add_to_feeds(track_id, and_(
+                    Follower.following_id == artist_id, Follower.id > first_id, Follower.id <= last_id
+                )))
+                notified = []
+                if notify:
+                    rows = [
+                        {
+                            "user_id": follower.follower_id,
+                            "from_user_id": artist_id,
+                            "type": "new_track",
+                            "target_id": track_id,
+                            "is_read": False,
+                        }
+                        for follower in followers
+                    ]
+                    stmt = insert_new_tracks(conn.dialect.name)
+                    if conn.dialect.insert_executemany_returning:
+                        # Solo las filas insertadas: las que ya existían (ON CONFLICT) no suman ni se publican
+                        notified = conn.execute(stmt.returning(Notification.user_id), rows).scalars().all()
+                    else:
+                        conn.execute(stmt, rows)
+                        notified = [row["user_id"] for row in rows]
+                conn.commit()
+                created += len(followers)
+
+                for user_id in notified:
+                    notification_counts.notification_added(user_id)
+                    publish_to_user(user_id, "notification", {
+                        "type": "new_track",
+                        "from_user_id": artist_id,
+                        "target_id": track_id,
+                    })
+        return created
+
+    async def run(self):
+        """Worker de reparto (se lanza desde el lifespan de la app)"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        try:
+            while True:
+                track_id, artist_id, notify = await self._queue.get()
+                try:
+                    await to_thread.run_sync(self.process, track_id, artist_id, notify)
+                except Exception as e:
+                    print(f"❌ Error repartiendo notificaciones del track {track_id}: {e}")
+        finally:
+            self._loop = None
+
+    def drain(self):
+        """Procesa los eventos que quedaron en cola (al apagar la app)"""
+        while self._queue is not None and not self._queue.empty():
+            track_id, artist_id, notify = self._queue.get_nowait()
+            try:
+                self.process(track_id, artist_id, notify)
+            except Exception as e:
+                print(f"❌ Error repartiendo notificaciones del track {track_id}: {e}")
+
+
+def insert_new_tracks(dialect_name: str):
+    """
+    INSERT de notificaciones 'new_track' que ignora las que ya existen
+
+    El índice único parcial (user_id, target_id) evita duplicados si el pull
+    de dos pestañas o el pull y el reparto coinciden.
+    """
+    dialects = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+    if dialect_name not in dialects:
+        return insert(Notification)
+    return dialects[dialect_name](Notification).on_conflict_do_nothing(
+        index_elements=["user_id", "target_id"],
+        # Literal en el SQL: los parámetros del WHERE no se admiten en executemany
+        index_where=Notification.type == literal_column("'new_track'")
+    )
+
+
+fanout = NotificationFanout(
+    chunk_size=settings.NOTIFICATION_FANOUT_CHUNK,
+    threshold=settings.NOTIFICATION_FANOUT_THRESHOLD,
+)
+
+# Usuarios cuyo pull se hizo hace menos de NOTIFICATION_PULL_INTERVAL segundos
+recent_pulls = TTLCache(ttl=settings.NOTIFICATION_PULL_INTERVAL)
+
+def pull_new_tracks(db: Session, user_id: int, throttled: bool = False) -> int:
+    """
+    🎯 Fan-out en lectura: materializar los 'new_track' de los artistas grandes que sigo
+
+    Primero un EXISTS (solo lectura): si el usuario no sigue a ningún artista
+    por encima del umbral o no hay nada nuevo, la lectura no escribe nada. Si
+    hay pendientes, un único INSERT ... SELECT con los tracks públicos recientes
+    (publicados después de empezar a seguirles) que aún no tienen notificación;
+    las insertadas se suman al badge y se publican por el canal push.
+
+    Con throttled=True (el badge, que se consulta a menudo) se hace como mucho
+    una vez cada NOTIFICATION_PULL_INTERVAL segundos por usuario.
+    """
+    if throttled and recent_pulls.get(user_id):
+        return 0
+    recent_pulls.set(user_id, True)
+
+    since = datetime.now(timezone.utc) - timedelta(days=settings.NOTIFICATION_PULL_WINDOW_DAYS)
+    already_notified = exists().where(
+        Notification.user_id == user_id,
+        Notification.type == "new_track",
+        Notification.target_id == Track.id
+    )
+    pending = select(
+        literal(user_id), Track.user_id, literal("new_track"), Track.id, literal(False), Track.created_at
+    ).join(
+        Follower, and_(Follower.following_id == Track.user_id, Follower.follower_id == user_id)
+    ).join(
+        User, User.id == Track.user_id
+    ).where(
+        User.follower_count >= settings.NOTIFICATION_FANOUT_THRESHOLD,
+        Track.is_public == True,
+        Track.created_at >= Follower.created_at,
+        Track.created_at >= since,
+        ~already_notified
+    )
+
+    if not db.scalar(select(pending.exists())):
+        return 0
+
+    stmt = insert_new_tracks(db.bind.dialect.name).from_select(
+        ["user_id", "from_user_id", "type", "target_id", "is_read", "created_at"], pending
+    )
+    if db.bind.dialect.insert_returning:
+        pulled = db.execute(stmt.returning(Notification.from_user_id, Notification.target_id)).all()
+        inserted = len(pulled)
+    else:
+        pulled = []
+        inserted = db.execute(stmt).rowcount
+    db.commit()
+    notification_counts.invalidate_counts(user_id)
+    for artist_id, track_id in pulled:
+        publish_to_user(user_id, "notification", {
+            "type": "new_track",
+            "from_user_id": artist_id,
+            "target_id": track_id,
+        })
+    return inserted
@@ -0,0 +1,119 @@
+from sqlalchemy import and_, delete, exists, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.feed_entry import FeedEntry
+from app.models.follower import Follower
+from app.models.track import Track
+from app.models.user import User
+from app.utils.loaders import track_response_options
+from app.utils.pagination import encode_cursor, older_than
+
+FEED_COLUMNS = ["user_id", "track_id", "artist_id", "created_at"]
+
+def add_to_feeds(track_id: int, followers_filter):
+    """
+    INSERT ... SELECT que añade un track al feed de los seguidores que cumplan el filtro
+
+    created_at se copia tal cual de tracks.created_at (mismo formato en la BD),
+    así el feed se puede mezclar y paginar junto con los tracks leídos en pull.
+    """
+    already_in_feed = exists().where(
+        FeedEntry.user_id == Follower.follower_id,
+        FeedEntry.track_id == Track.id
+    )
+    rows = select(
+        Follower.follower_id, Track.id, Track.user_id, Track.created_at
+    ).join(
+        Track, Track.id == track_id
+    ).where(followers_filter, ~already_in_feed)
+    return insert(FeedEntry).from_select(FEED_COLUMNS, rows)
+
+def backfill_artist(db: Session, user_id: int, artist_id: int) -> int:
+    """
+    🎯 Al seguir a un artista, copiar sus últimos tracks públicos al feed (no hace commit)
+
+    Los artistas por encima del umbral de reparto no se copian: ya entran en pull.
+    """
+    recent = select(
+        literal(user_id), Track.id, Track.user_id, Track.created_at
+    ).join(
+        User, User.id == Track.user_id
+    ).where(
+        Track.user_id == artist_id,
+        Track.is_public == True,
+        User.follower_count < settings.NOTIFICATION_FANOUT_THRESHOLD,
+        ~exists().where(FeedEntry.user_id == user_id, FeedEntry.track_id == Track.id)
+    ).order_by(Track.created_at.desc(), Track.id.desc()).limit(settings.FEED_BACKFILL_TRACKS)
+
+    result = db.execute(insert(FeedEntry).from_select(FEED_COLUMNS, recent))
+    return result.rowcount
+
+def remove_artist(db: Session, user_id: int, artist_id: int):
+    """🎯 Quitar del feed los tracks de un artista (al dejar de seguirle; no hace commit)"""
+    db.execute(delete(FeedEntry).where(FeedEntry.user_id == user_id, FeedEntry.artist_id == artist_id))
+
+def remove_track(db: Session, track_id: int):
+    """🎯 Quitar un track de todos los feeds (al borrarlo o hacerlo privado; no hace commit)"""
+    db.execute(delete(FeedEntry).where(FeedEntry.track_id == track_id))
+
+def remove_user(db: Session, user_id: int):
+    """🎯 Borrar el feed de un usuario y sus tracks de los feeds ajenos (no hace commit)"""
+    db.execute(delete(FeedEntry).where(or_(FeedEntry.user_id == user_id, FeedEntry.artist_id == user_id)))
+
+def feed_page(db: Session, user_id: int, after, limit: int):
+    """
+    🎯 Página del feed: entradas repartidas al publicar + tracks en pull de los artistas grandes
+
+    Cada fuente se recorre por su índice (created_at, track_id) con el mismo
+    keyset y se mezclan con UNION; luego se cargan los tracks con su artista
+    en una segunda consulta. Devuelve (tracks, next_cursor).
+    """
+    pushed = select(
+        FeedEntry.track_id.label("track_id"), FeedEntry.created_at.label("created_at")
+    ).where(FeedEntry.user_id == user_id)
+
+    pulled = select(
+        Track.id.label("track_id"), Track.created_at.label("created_at")
+    ).join(
+        Follower, and_(Follower.following_id == Track.user_id, Follower.follower_id == user_id)
+    ).join(
+        User, User.id == Track.user_id
+    ).where(
+        User.follower_count >= settings.NOTIFICATION_FANOUT_THRESHOLD,
+        Track.is_public == True,
+        Track.created_at.isnot(None)  # sin fecha no tiene sitio en el keyset
+    )
+
+    if after:
+        created_at, last_track_id = after
+        pushed = pushed.where(older_than(db, FeedEntry.created_at, FeedEntry.track_id, created_at, last_track_id))
+        pulled = pulled.where(older_than(db, Track.created_at, Track.id, created_at, last_track_id))
+
+    sources = [
+        source.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).subquery()
+        for source, created_col, id_col in (
+            (pushed, FeedEntry.created_at, FeedEntry.track_id),
+            (pulled, Track.created_at, Track.id),
+        )
+    ]
+    merged = select(sources[0].c.track_id, sources[0].c.created_at).union(
+        select(sources[1].c.track_id, sources[1].c.created_at)
+    ).subquery()
+    rows = db.execute(
+        select(merged.c.track_id, merged.c.created_at)
+        .order_by(merged.c.created_at.desc(), merged.c.track_id.desc())
+        .limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].track_id)
+
+    track_ids = list(dict.fromkeys(row.track_id for row in rows))
+    if not track_ids:
+        return [], next_cursor
+    tracks = db.query(Track).options(*track_response_options()).filter(Track.id.in_(track_ids)).all()
+    tracks_by_id = {track.id: track for track in tracks}
+    return [tracks_by_id[track_id] for track_id in track_ids if track_id in tracks_by_id], next_cursor
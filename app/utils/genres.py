@@ -0,0 +1,38 @@
+from sqlalchemy import exists, func, select, update
+
+from app.models.track import Track
+
+def normalize_genre(genre):
+    """
+    🎯 Forma canónica de un género ("  Deep House " -> "deep house")
+
+    Debe coincidir con la normalización en SQL de normalize_existing_genres.
+    """
+    if genre is None:
+        return None
+    genre = genre.strip().lower()
+    return genre or None
+
+def normalize_existing_genres(engine) -> int:
+    """
+    Normaliza los géneros ya guardados (se llama al arrancar); devuelve cuántos tracks cambiaron
+
+    Las altas y ediciones ya normalizan el género (esquemas), así que solo
+    quedan filas anteriores: primero se comprueba con un EXISTS de solo
+    lectura y el UPDATE solo se lanza si hay algo que normalizar.
+    """
+    pending = (Track.genre != func.lower(func.trim(Track.genre))) | (Track.genre == "")
+    with engine.begin() as conn:
+        if not conn.execute(select(exists().where(pending))).scalar():
+            return 0
+        result = conn.execute(
+            update(Track)
+            .where(Track.genre != func.lower(func.trim(Track.genre)))
+            .values(genre=func.lower(func.trim(Track.genre)), updated_at=Track.updated_at)
+        )
+        blank = conn.execute(
+            update(Track)
+            .where(Track.genre == "")
+            .values(genre=None, updated_at=Track.updated_at)
+        )
+    return result.rowcount + blank.rowcount
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils.security import create_password_hash, verify_password
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de hilos acotado para no congelar el event loop
+
+    bcrypt libera el GIL mientras calcula, así que los hilos trabajan en
+    paralelo. Si hay más de `workers + max_queue` operaciones en curso se
+    responde 429 en lugar de acumular peticiones sin límite.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0  # solo se toca desde el event loop
+        self._stats = {}
+
+    async def _run(self, operation: str, fn, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self._record(operation, None)
+            raise HTTPException(
+                status_code=429,
+                detail="Servidor ocupado, inténtalo de nuevo en unos segundos",
+                headers={"Retry-After": "1"}
+            )
+
+        self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._record(operation, time.perf_counter() - start)
+
+    def _record(self, operation: str, elapsed):
+        stats = self._stats.setdefault(operation, {"count": 0, "rejected": 0, "total": 0.0, "max": 0.0})
+        if elapsed is None:
+            stats["rejected"] += 1
+            return
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", create_password_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run("verify", verify_password, password, hashed)
+
+    def metrics(self) -> dict:
+        """Latencia de hash/verify y ocupación del pool"""
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "operations": {
+                operation: {
+                    "count": stats["count"],
+                    "rejected": stats["rejected"],
+                    "avg_ms": round(stats["total"] / stats["count"] * 1000, 3) if stats["count"] else 0.0,
+                    "max_ms": round(stats["max"] * 1000, 3),
+                }
+                for operation, stats in self._stats.items()
+            }
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
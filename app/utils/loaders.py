@@ -0,0 +1,37 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.comment import Comment
+from app.models.notification import Notification
+from app.models.track import Track
+from app.models.user import User
+
+# 🎯 Opciones de carga por esquema de respuesta
+#
+# Cada respuesta que anida usuarios (TrackResponse.artist,
+# NotificationResponse.sender, ...) tiene aquí su preset para que las
+# consultas de listado traigan las relaciones en la misma consulta en lugar
+# de lanzar un SELECT perezoso por fila al serializar.
+
+# Columnas de User que necesita UserResponse
+USER_RESPONSE_COLUMNS = (
+    User.id, User.username, User.email, User.display_name, User.bio,
+    User.avatar_url, User.location, User.website_url, User.created_at
+)
+
+def track_response_options():
+    """TrackResponse: el artista (muchos-a-uno) por JOIN, solo con las columnas de UserResponse"""
+    return (
+        joinedload(Track.artist).load_only(*USER_RESPONSE_COLUMNS),
+    )
+
+def notification_response_options():
+    """NotificationResponse: el remitente por JOIN, solo con las columnas de UserResponse"""
+    return (
+        joinedload(Notification.sender).load_only(*USER_RESPONSE_COLUMNS),
+    )
+
+def comment_response_options():
+    """CommentResponse: los autores de toda la página en una consulta (IN)"""
+    return (
+        selectinload(Comment.author).load_only(*USER_RESPONSE_COLUMNS),
+    )
@@ -0,0 +1,112 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.notification import Notification
+from app.utils.cache import TTLCache
+
+
+class CounterBackend(ABC):
+    """
+    Interfaz del almacén de contadores de notificaciones por usuario
+
+    Cada entrada es {"unread": n, "total": m}. Para compartir los contadores
+    entre varios workers se puede implementar sobre Redis o similar y
+    activarlo con set_backend().
+    """
+
+    @abstractmethod
+    def get(self, user_id: int) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def set(self, user_id: int, counts: dict):
+        ...
+
+    @abstractmethod
+    def incr(self, user_id: int, unread: int = 0, total: int = 0):
+        """Ajusta los contadores solo si el usuario ya está cacheado"""
+
+    @abstractmethod
+    def delete(self, user_id: int):
+        ...
+
+
+class InMemoryCounterBackend(CounterBackend):
+    """
+    Contadores en memoria del proceso (por defecto)
+
+    Limitación: cada worker tiene su propia caché y solo ve los cambios que
+    pasan por él. Con varios workers el badge puede ir desfasado hasta
+    NOTIFICATION_COUNTS_TTL segundos (y su ETag con él); para contadores
+    exactos entre workers hay que usar un backend compartido.
+    """
+
+    def __init__(self, ttl: float):
+        self._cache = TTLCache(ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[dict]:
+        counts = self._cache.get(user_id)
+        return dict(counts) if counts else None
+
+    def set(self, user_id: int, counts: dict):
+        self._cache.set(user_id, dict(counts))
+
+    def incr(self, user_id: int, unread: int = 0, total: int = 0):
+        with self._lock:
+            counts = self._cache.get(user_id)
+            if counts is None:
+                return
+            self._cache.set(user_id, {
+                "unread": max(counts["unread"] + unread, 0),
+                "total": max(counts["total"] + total, 0),
+            })
+
+    def delete(self, user_id: int):
+        self._cache.delete(user_id)
+
+
+backend: CounterBackend = InMemoryCounterBackend(ttl=settings.NOTIFICATION_COUNTS_TTL)
+
+def set_backend(new_backend: CounterBackend):
+    """Sustituye el almacén de contadores (p. ej. por uno compartido)"""
+    global backend
+    backend = new_backend
+
+def get_counts(db: Session, user_id: int) -> dict:
+    """
+    🎯 Contadores de notificaciones de un usuario: de la caché o con una sola consulta
+    """
+    counts = backend.get(user_id)
+    if counts is None:
+        total, unread = db.query(
+            func.count(Notification.id),
+            func.coalesce(func.sum(case((Notification.is_read == False, 1), else_=0)), 0)
+        ).filter(Notification.user_id == user_id).one()
+        counts = {"unread": int(unread), "total": int(total)}
+        backend.set(user_id, counts)
+    return counts
+
+def cached_counts(user_id: int) -> Optional[dict]:
+    """Contadores cacheados, sin consultar la base de datos"""
+    return backend.get(user_id)
+
+def counts_etag(user_id: int, counts: dict) -> str:
+    return f'W/"{user_id}-{counts["unread"]}-{counts["total"]}"'
+
+def notification_added(user_id: int, count: int = 1):
+    backend.incr(user_id, unread=count, total=count)
+
+def notifications_read(user_id: int, count: int = 1):
+    backend.incr(user_id, unread=-count)
+
+def notification_deleted(user_id: int, was_read: bool):
+    backend.incr(user_id, unread=0 if was_read else -1, total=-1)
+
+def invalidate_counts(user_id: int):
+    backend.delete(user_id)
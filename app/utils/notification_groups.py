@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import func
+
+from app.config import settings
+from app.models.comment import Comment
+from app.models.follower import Follower
+from app.models.like import Like
+from app.models.notification import Notification
+
+# Tipos que se agrupan y si el grupo depende del elemento (target_id): los
+# follows de distintos usuarios se acumulan en un mismo grupo, los likes y
+# comentarios solo si son sobre el mismo track
+GROUPED_TYPES = {
+    "follow": False,
+    "like": True,
+    "comment": True,
+}
+
+def _actor_count(type: str):
+    """
+    Remitentes distintos del grupo, contados en la tabla de origen desde que se
+    abrió (subconsulta correlacionada con la fila de Notification que se actualiza)
+    """
+    if type == "follow":
+        actors = select(func.count(Follower.id)).where(
+            Follower.following_id == Notification.user_id,
+            Follower.created_at >= Notification.created_at
+        )
+    else:
+        model = Like if type == "like" else Comment
+        actors = select(func.count(model.user_id.distinct())).where(
+            model.track_id == Notification.target_id,
+            model.user_id != Notification.user_id,
+            model.created_at >= Notification.created_at
+        )
+    return actors.scalar_subquery()
+
+def add_notification(db: Session, user_id: int, from_user_id: int, type: str, target_id: int = None):
+    """
+    🎯 Crear una notificación o sumarla al grupo abierto del mismo tipo
+
+    Un grupo sigue abierto mientras no se haya leído y haya tenido actividad
+    (last_activity_at) en los últimos NOTIFICATION_GROUP_WINDOW_MINUTES. Al
+    sumarse, el grupo pasa a tener como remitente al último usuario y se
+    actualiza last_activity_at; created_at no se toca, así el grupo no cambia
+    de página en los cursores ni cruza un "marcar leídas hasta aquí".
+
+    actor_count se recalcula con los follows/likes/comentarios que existen
+    desde que se abrió el grupo, así que la fila de origen tiene que estar ya
+    en la sesión: un follow, unfollow y follow de nuevo no lo infla.
+
+    No hace commit. Devuelve (notificación, creada): si se sumó a un grupo
+    existente el número de no leídas no cambia.
+    """
+    group = None
+    if type in GROUPED_TYPES:
+        since = datetime.now(timezone.utc) - timedelta(minutes=settings.NOTIFICATION_GROUP_WINDOW_MINUTES)
+        query = db.query(Notification).filter(
+            Notification.user_id == user_id,
+            Notification.type == type,
+            Notification.is_read == False,
+            Notification.last_activity_at >= since
+        )
+        if GROUPED_TYPES[type]:
+            query = query.filter(Notification.target_id == target_id)
+        # FOR UPDATE bloquea el grupo en PostgreSQL. En SQLite no se emite: las
+        # escrituras ya se serializan con el bloqueo de la base de datos y, en el
+        # peor caso, dos follows simultáneos abren dos grupos o uno no entra en la
+        # muestra (el contador se recalcula en SQL y no se pierde)
+        group = query.order_by(
+            Notification.last_activity_at.desc(), Notification.id.desc()
+        ).with_for_update().first()
+
+    if group is None:
+        notification = Notification(
+            user_id=user_id,
+            from_user_id=from_user_id,
+            type=type,
+            target_id=target_id,
+            actor_count=1,
+            sender_sample=[from_user_id]
+        )
+        db.add(notification)
+        db.flush()
+        return notification, True
+
+    sample = list(group.sender_sample or [group.from_user_id])
+    values = {
+        "sender_sample": ([from_user_id] + [uid for uid in sample if uid != from_user_id])[
+            :settings.NOTIFICATION_GROUP_SAMPLE_SIZE
+        ],
+        "from_user_id": from_user_id,
+        "target_id": target_id,
+        "last_activity_at": func.now(),
+    }
+    if from_user_id not in sample and from_user_id != group.from_user_id:
+        # Contar en la tabla de origen y no sumar 1: quien deja de seguir y
+        # vuelve a seguir (o cae fuera de la muestra) no cuenta dos veces
+        db.flush()
+        values["actor_count"] = _actor_count(type)
+    # UPDATE ... RETURNING: los valores calculados en SQL vuelven en la misma
+    # sentencia y el grupo queda al día sin otro SELECT
+    row = db.execute(
+        update(Notification).where(Notification.id == group.id).values(**values)
+        .returning(Notification.actor_count, Notification.last_activity_at),
+        execution_options={"synchronize_session": False}
+    ).one()
+    values.update(actor_count=row.actor_count, last_activity_at=row.last_activity_at)
+    for key, value in values.items():
+        set_committed_value(group, key, value)
+    return group, False
@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, literal, or_
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+from sqlalchemy.engine import Row
+
+# SQLite guarda los server_default=func.now() sin microsegundos: el valor del
+# cursor se compara con ese mismo formato para que el desempate por id funcione
+SQLITE_SECONDS = SQLITE_DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Codifica (created_at, id) como un cursor opaco"""
+    if created_at is None or item_id is None:
+        # Las consultas paginadas excluyen las filas sin fecha: esto es un fallo del servidor
+        raise ValueError("No se puede codificar un cursor sin clave de orden")
+    raw = json.dumps([created_at.isoformat(), item_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    """Decodifica un cursor opaco a (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        created_at, item_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+def older_than(db, created_col, id_col, created_at: datetime, item_id: int, inclusive: bool = False):
+    """
+    Condición keyset: filas posteriores a (created_at, id) en orden descendente,
+    es decir, más antiguas (con inclusive=True incluye la propia fila del cursor)
+    """
+    if db.bind.dialect.name == "sqlite" and not created_at.microsecond:
+        created_at = literal(created_at, type_=SQLITE_SECONDS)
+    same_time = id_col <= item_id if inclusive else id_col < item_id
+    return or_(created_col < created_at, and_(created_col == created_at, same_time))
+
+class CursorParams:
+    """
+    🎯 Dependencia de paginación por cursor (opt-in) compartida por los routers
+
+    Si se pide `cursor_mode=true` o se envía un `cursor`, el endpoint devuelve
+    un CursorPage con `next_cursor` en lugar de la lista paginada con offset.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor"),
+        cursor_mode: bool = Query(False, description="Paginar por cursor en lugar de skip/limit"),
+    ):
+        self.enabled = cursor_mode or cursor is not None
+        self.after = decode_cursor(cursor) if cursor else None
+
+    def paginate(self, query, created_col, id_col, limit: int):
+        """
+        Aplica el keyset (created_at, id) descendente; devuelve (filas, next_cursor)
+
+        Las filas sin created_at (datos antiguos) no tienen posición en el orden
+        y quedan fuera de la paginación por cursor.
+        """
+        query = query.filter(created_col.isnot(None))
+        if self.after:
+            created_at, last_id = self.after
+            query = query.filter(older_than(query.session, created_col, id_col, created_at, last_id))
+
+        rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            if isinstance(last, Row):
+                # Consultas con columnas extra (entidad, agregados...): el cursor sale de la entidad
+                last = last[0]
+            next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+        return rows, next_cursor
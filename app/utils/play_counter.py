@@ -0,0 +1,188 @@
+import asyncio
+import math
+import threading
+from collections import defaultdict
+
+from anyio import to_thread
+from sqlalchemy import bindparam, func, select, update
+
+from app import database
+from app.config import settings
+from app.models.track import Track
+from app.models.user import User
+
+
+class _Shard:
+    """Reproducciones pendientes de una parte de los tracks, con su propio lock"""
+
+    __slots__ = ("lock", "counts", "total", "dropped")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+        # Pendientes del shard, incluidas las que se están volcando
+        self.total = 0
+        self.dropped = 0
+
+
+class PlayCounter:
+    """Contador de reproducciones en memoria con escritura diferida (write-behind)
+
+    Las reproducciones se acumulan en shards (cada uno con su propio lock y su
+    propio total, así una reproducción solo toca el lock de su shard) y se
+    vuelcan en lote con un único UPDATE play_count = play_count + n por track.
+
+    - Cuando un shard llega a su parte de `max_pending` se despierta al worker
+      para que vuelque antes de tiempo, nunca en el hilo de la petición.
+    - Cada shard guarda como mucho su parte de `max_buffered` (contando las que
+      se están volcando). Si está lleno, p. ej. porque la BD no responde, las
+      reproducciones nuevas de ese shard se descartan (y se cuentan en
+      `dropped`) hasta el siguiente volcado correcto: es el máximo que se
+      pierde si el proceso muere.
+    """
+
+    def __init__(self, shards: int = 16, flush_interval: float = 5.0, max_pending: int = 1000,
+                 max_buffered: int = 100000):
+        self.flush_interval = flush_interval
+        self._shards = [_Shard() for _ in range(max(shards, 1))]
+        # Límites por shard (el total es, como mucho, el del parámetro redondeado hacia arriba)
+        self.flush_at = max(math.ceil(max_pending / len(self._shards)), 1)
+        self.capacity = max(math.ceil(max_buffered / len(self._shards)), self.flush_at)
+        self._flush_lock = threading.Lock()
+        # Aviso al worker (solo existe mientras corre run())
+        self._loop = None
+        self._wakeup = None
+        self._signalled = False
+
+    def _shard(self, track_id: int) -> _Shard:
+        return self._shards[track_id % len(self._shards)]
+
+    def _signal_flush(self):
+        # Lectura/escritura sin lock: como mucho se avisa dos veces (set() es idempotente)
+        if self._signalled:
+            return
+        self._signalled = True
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # loop ya cerrado (apagado): el volcado final lo recoge
+
+    def increment(self, track_id: int, n: int = 1) -> bool:
+        """Registra n reproducciones de un track (no escribe en la BD); False si se descartan"""
+        shard = self._shard(track_id)
+        with shard.lock:
+            if shard.total + n > self.capacity:
+                shard.dropped += n
+                accepted = False
+            else:
+                shard.counts[track_id] += n
+                shard.total += n
+                accepted = True
+            flush_soon = shard.total >= self.flush_at
+
+        if flush_soon:
+            self._signal_flush()
+        return accepted
+
+    def pending(self, track_id: int) -> int:
+        """Reproducciones de un track que aún no están en la base de datos"""
+        shard = self._shard(track_id)
+        with shard.lock:
+            return shard.counts.get(track_id, 0)
+
+    def pending_total(self) -> int:
+        """Pendientes de todos los shards (aproximado: sin bloquearlos)"""
+        return sum(shard.total for shard in self._shards)
+
+    def dropped_total(self) -> int:
+        return sum(shard.dropped for shard in self._shards)
+
+    def _drain(self) -> list:
+        """Vacía los shards; sus totales siguen contando lo drenado hasta confirmar el volcado"""
+        self._signalled = False
+        drained = []
+        for shard in self._shards:
+            with shard.lock:
+                drained.append(dict(shard.counts))
+                shard.counts.clear()
+        return drained
+
+    def _settle(self, drained: list, flushed: bool):
+        """Tras el volcado: descuenta lo volcado o, si falló, lo devuelve a su shard"""
+        for shard, counts in zip(self._shards, drained):
+            with shard.lock:
+                if flushed:
+                    shard.total -= sum(counts.values())
+                else:
+                    for track_id, n in counts.items():
+                        shard.counts[track_id] += n
+
+    def flush(self) -> int:
+        """Vuelca las reproducciones pendientes; devuelve cuántos tracks se actualizaron"""
+        with self._flush_lock:
+            if not database.engine:
+                database.init_engine()
+
+            drained = self._drain()
+            totals = defaultdict(int)
+            for counts in drained:
+                for track_id, n in counts.items():
+                    totals[track_id] += n
+            if not totals:
+                return 0
+
+            stmt = (
+                update(Track)
+                .where(Track.id == bindparam("track_id"))
+                .values(play_count=func.coalesce(Track.play_count, 0) + bindparam("plays"))
+            )
+            # total_plays del artista (solo cuenta reproducciones de tracks públicos)
+            artist_stmt = (
+                update(User)
+                .where(User.id == select(Track.user_id).where(
+                    Track.id == bindparam("track_id"), Track.is_public == True
+                ).scalar_subquery())
+                .values(total_plays=User.total_plays + bindparam("plays"))
+            )
+            params = [{"track_id": track_id, "plays": n} for track_id, n in totals.items()]
+            try:
+                with database.engine.begin() as conn:
+                    conn.execute(stmt, params)
+                    conn.execute(artist_stmt, params)
+            except Exception:
+                # No perder las reproducciones: se reintentan en el próximo volcado
+                self._settle(drained, flushed=False)
+                raise
+            self._settle(drained, flushed=True)
+            return len(params)
+
+    async def run(self):
+        """Bucle de volcado periódico o al llenarse un shard hasta max_pending (lifespan de la app)"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                try:
+                    await to_thread.run_sync(self.flush)
+                except Exception as e:
+                    print(f"❌ Error volcando reproducciones: {e}")
+                    # Sin reintentos en bucle mientras la BD no responda
+                    await asyncio.sleep(self.flush_interval)
+        finally:
+            self._loop = None
+            self._wakeup = None
+
+
+play_counter = PlayCounter(
+    shards=settings.PLAY_COUNT_SHARDS,
+    flush_interval=settings.PLAY_COUNT_FLUSH_INTERVAL,
+    max_pending=settings.PLAY_COUNT_MAX_PENDING,
+    max_buffered=settings.PLAY_COUNT_MAX_BUFFERED,
+)
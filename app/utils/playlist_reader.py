@@ -0,0 +1,77 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.playlist import Playlist
+from app.models.playlist_track import PlaylistTrack
+from app.models.track import Track
+from app.schemas.playlist import PlaylistResponse, PlaylistTrackResponse
+from app.schemas.user import UserResponse
+from app.utils.loaders import USER_RESPONSE_COLUMNS
+
+def playlist_stats_subquery():
+    """track_count y total_duration de cada playlist en un único GROUP BY"""
+    return (
+        select(
+            PlaylistTrack.playlist_id,
+            func.count(PlaylistTrack.id).label("track_count"),
+            func.sum(Track.duration_seconds).label("total_duration"),
+        )
+        .join(Track, Track.id == PlaylistTrack.track_id)
+        .group_by(PlaylistTrack.playlist_id)
+        .subquery()
+    )
+
+def playlist_stats(db: Session, playlist_id: int) -> dict:
+    """Número de canciones y duración total de una playlist con una consulta agregada (sin cargar las canciones)"""
+    track_count, total_duration = db.query(
+        func.count(PlaylistTrack.id), func.coalesce(func.sum(Track.duration_seconds), 0)
+    ).join(Track, Track.id == PlaylistTrack.track_id).filter(PlaylistTrack.playlist_id == playlist_id).one()
+    return {"track_count": track_count, "total_duration": total_duration}
+
+def playlist_query(db: Session, detail: bool = False):
+    """
+    🎯 Consulta de lectura de playlists: cada fila es (playlist, track_count, total_duration)
+
+    - Resumen: playlist + DJ + agregados en una sola consulta.
+    - Detalle: además, las canciones con su track y artista en una segunda
+      consulta por lotes (IN con los ids de la página).
+    """
+    stats = playlist_stats_subquery()
+    options = [joinedload(Playlist.dj).load_only(*USER_RESPONSE_COLUMNS)]
+    if detail:
+        options.append(
+            selectinload(Playlist.playlist_tracks)
+            .joinedload(PlaylistTrack.track)
+            .joinedload(Track.artist)
+            .load_only(*USER_RESPONSE_COLUMNS)
+        )
+    return (
+        db.query(
+            Playlist,
+            func.coalesce(stats.c.track_count, 0).label("track_count"),
+            stats.c.total_duration,
+        )
+        .outerjoin(stats, stats.c.playlist_id == Playlist.id)
+        .options(*options)
+    )
+
+def build_playlist_response(row, detail: bool = False) -> PlaylistResponse:
+    """
+    🎯 Construir la respuesta de una fila de playlist_query sin tocar relaciones sin cargar
+    """
+    playlist, track_count, total_duration = row
+    return PlaylistResponse(
+        id=playlist.id,
+        user_id=playlist.user_id,
+        title=playlist.title,
+        description=playlist.description,
+        is_public=playlist.is_public,
+        cover_image_url=playlist.cover_image_url,
+        created_at=playlist.created_at,
+        track_count=track_count,
+        total_duration=total_duration,
+        dj=UserResponse.model_validate(playlist.dj) if playlist.dj else None,
+        playlist_tracks=[
+            PlaylistTrackResponse.model_validate(playlist_track) for playlist_track in playlist.playlist_tracks
+        ] if detail else []
+    )
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from app.config import settings
+
+
+class Subscription:
+    """Suscripción de una conexión (SSE) a un canal: una cola acotada en su event loop"""
+
+    def __init__(self, channel: str, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    def deliver(self, message: dict):
+        """Se ejecuta en el event loop; si el cliente va lento se descarta el mensaje más antiguo"""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class Broker(ABC):
+    """
+    Interfaz de pub/sub para las notificaciones en tiempo real
+
+    La implementación por defecto vive en memoria del proceso; con varios
+    workers se puede sustituir (set_broker) por una sobre Redis u otro broker
+    que reenvíe los mensajes a los suscriptores locales.
+    """
+
+    @abstractmethod
+    def publish(self, channel: str, message: dict):
+        ...
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription):
+        ...
+
+
+class InMemoryBroker(Broker):
+    """Pub/sub en memoria; publish() se puede llamar desde cualquier hilo"""
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: dict):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Event loop ya cerrado: la conexión se está desmontando
+                pass
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+
+broker: Broker = InMemoryBroker(max_queue=settings.PUSH_MAX_QUEUE)
+
+def set_broker(new_broker: Broker):
+    """Sustituye el broker de pub/sub (p. ej. por uno compartido entre workers)"""
+    global broker
+    broker = new_broker
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def publish_to_user(user_id: int, event: str, data: dict):
+    """
+    🎯 Enviar un evento en tiempo real a las conexiones abiertas de un usuario
+    """
+    broker.publish(user_channel(user_id), {"event": event, "data": data})
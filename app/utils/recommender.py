@@ -0,0 +1,244 @@
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+
+from anyio import to_thread
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.like import Like
+from app.models.track import Track
+from app.models.track_similarity import TrackSimilarity
+from app.utils.loaders import track_response_options
+
+# Tabla de likes con dos alias para el auto-JOIN (pares de tracks del mismo usuario)
+LIKES_A = Like.__table__.alias("likes_a")
+LIKES_B = Like.__table__.alias("likes_b")
+
+
+class TrackRecommender:
+    """
+    Recomendador item-item por likes compartidos (filtrado colaborativo implícito)
+
+    La tabla likes es una matriz usuarios x tracks. La co-ocurrencia de dos
+    tracks (cuántos usuarios dieron like a ambos) se calcula en la base de
+    datos con un auto-JOIN agrupado, que solo produce los pares no nulos
+    (la matriz dispersa); la similitud es el coseno
+    co(a, b) / sqrt(likes(a) * likes(b)) y por cada track se guardan sus
+    `top_k` vecinos en track_similarities.
+
+    - Incremental: cada like marca su track como pendiente y cada
+      `update_interval` se recalculan solo los vecinos de esos tracks.
+    - Completo: cada `rebuild_interval` se reconstruye la tabla entera
+      (también recoge los cambios indirectos en los vecinos de otros tracks).
+    """
+
+    def __init__(self, top_k: int, min_colikes: int, update_interval: float, rebuild_interval: float):
+        self.top_k = top_k
+        self.min_colikes = min_colikes
+        self.update_interval = update_interval
+        self.rebuild_interval = rebuild_interval
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._last_update = None
+        self._last_rebuild = None
+
+    def mark_dirty(self, track_id: int):
+        """Marca un track cuyos likes han cambiado (se recalcula en la próxima actualización)"""
+        with self._lock:
+            self._dirty.add(track_id)
+
+    def _colikes(self, track_ids=None):
+        """
+        Pares (track, vecino, usuarios en común) con al menos `min_colikes` en
+        común, ordenados por track para poder consumirlos track a track
+        """
+        colikes = func.count().label("colikes")
+        query = select(LIKES_A.c.track_id, LIKES_B.c.track_id, colikes).join(
+            LIKES_B, and_(LIKES_B.c.user_id == LIKES_A.c.user_id, LIKES_B.c.track_id != LIKES_A.c.track_id)
+        )
+        if track_ids is not None:
+            query = query.where(LIKES_A.c.track_id.in_(track_ids))
+        return query.group_by(LIKES_A.c.track_id, LIKES_B.c.track_id).having(
+            colikes >= self.min_colikes
+        ).order_by(LIKES_A.c.track_id)
+
+    def _like_counts(self, conn, track_ids=None) -> dict:
+        query = select(Like.track_id, func.count()).group_by(Like.track_id)
+        if track_ids is not None:
+            query = query.where(Like.track_id.in_(track_ids))
+        return dict(conn.execute(query).all())
+
+    def _pairs_by_track(self, result):
+        """(track_id, [(vecino, co-likes), ...]) de un resultado de _colikes, un track cada vez"""
+        for track_id, rows in itertools.groupby(result, key=lambda row: row[0]):
+            yield track_id, [(other_id, colikes) for _, other_id, colikes in rows]
+
+    def _top_neighbours(self, track_id: int, pairs: list, like_counts: dict) -> list:
+        scored = (
+            (other_id, colikes / math.sqrt(like_counts[track_id] * like_counts[other_id]))
+            for other_id, colikes in pairs
+            if like_counts.get(track_id) and like_counts.get(other_id)
+        )
+        return [
+            {"track_id": track_id, "similar_track_id": other_id, "score": score}
+            for other_id, score in heapq.nlargest(self.top_k, scored, key=lambda item: (item[1], -item[0]))
+        ]
+
+    def update(self) -> int:
+        """Recalcula los vecinos de los tracks pendientes; devuelve cuántos tracks se actualizaron"""
+        with self._build_lock:
+            with self._lock:
+                track_ids = list(self._dirty)
+                self._dirty.clear()
+            if not track_ids:
+                return 0
+
+            if not database.engine:
+                database.init_engine()
+
+            started = time.perf_counter()
+            try:
+                with database.engine.begin() as conn:
+                    # Solo los pares de los tracks pendientes, y los likes de
+                    # esos tracks y de sus vecinos
+                    pairs = list(self._pairs_by_track(conn.execute(self._colikes(track_ids))))
+                    neighbour_ids = {other_id for _, track_pairs in pairs for other_id, _ in track_pairs}
+                    like_counts = self._like_counts(conn, set(track_ids) | neighbour_ids)
+                    pair_count = sum(len(track_pairs) for _, track_pairs in pairs)
+                    rows = [
+                        row for track_id, track_pairs in pairs
+                        for row in self._top_neighbours(track_id, track_pairs, like_counts)
+                    ]
+                    conn.execute(delete(TrackSimilarity).where(TrackSimilarity.track_id.in_(track_ids)))
+                    if rows:
+                        conn.execute(insert(TrackSimilarity), rows)
+            except Exception:
+                with self._lock:
+                    self._dirty.update(track_ids)
+                raise
+
+            self._last_update = {
+                "tracks": len(track_ids),
+                "pairs": pair_count,
+                "rows": len(rows),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+            return len(track_ids)
+
+    def rebuild(self) -> dict:
+        """Reconstruye la tabla de vecinos completa a partir de todos los likes"""
+        with self._build_lock:
+            if not database.engine:
+                database.init_engine()
+
+            started = time.perf_counter()
+            with self._lock:
+                self._dirty.clear()
+            # Los pares se leen en streaming y ordenados por track: en memoria
+            # solo están los de un track y los top_k vecinos ya elegidos
+            rows = []
+            pair_count = 0
+            with database.engine.connect() as conn:
+                like_counts = self._like_counts(conn)
+                result = conn.execution_options(stream_results=True).execute(self._colikes())
+                for track_id, track_pairs in self._pairs_by_track(result):
+                    pair_count += len(track_pairs)
+                    rows.extend(self._top_neighbours(track_id, track_pairs, like_counts))
+            computed = time.perf_counter() - started
+
+            with database.engine.begin() as conn:
+                conn.execute(delete(TrackSimilarity))
+                for start in range(0, len(rows), 1000):
+                    conn.execute(insert(TrackSimilarity), rows[start:start + 1000])
+
+            self._last_rebuild = {
+                "tracks": len({row["track_id"] for row in rows}),
+                "pairs": pair_count,
+                "rows": len(rows),
+                "compute_seconds": round(computed, 3),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+            return self._last_rebuild
+
+    async def run(self):
+        """Bucle de actualización incremental y reconstrucción periódica (lifespan de la app)"""
+        last_rebuild = time.monotonic()
+        while True:
+            await asyncio.sleep(self.update_interval)
+            try:
+                if self.rebuild_interval and time.monotonic() - last_rebuild >= self.rebuild_interval:
+                    await to_thread.run_sync(self.rebuild)
+                    last_rebuild = time.monotonic()
+                else:
+                    await to_thread.run_sync(self.update)
+            except Exception as e:
+                print(f"❌ Error actualizando recomendaciones: {e}")
+
+    def metrics(self) -> dict:
+        """Duración y tamaño de la última actualización y de la última reconstrucción"""
+        with self._lock:
+            pending = len(self._dirty)
+        return {
+            "top_k": self.top_k,
+            "pending_tracks": pending,
+            "last_update": self._last_update,
+            "last_rebuild": self._last_rebuild,
+        }
+
+
+recommender = TrackRecommender(
+    top_k=settings.RECOMMENDER_TOP_K,
+    min_colikes=settings.RECOMMENDER_MIN_COLIKES,
+    update_interval=settings.RECOMMENDER_UPDATE_INTERVAL,
+    rebuild_interval=settings.RECOMMENDER_REBUILD_INTERVAL,
+)
+
+def similar_tracks(db: Session, track_id: int, limit: int) -> list:
+    """
+    🎯 Tracks parecidos a uno dado (vecinos guardados), con su artista, en una consulta
+    """
+    return db.query(Track).options(*track_response_options()).join(
+        TrackSimilarity, TrackSimilarity.similar_track_id == Track.id
+    ).filter(
+        TrackSimilarity.track_id == track_id,
+        Track.is_public == True
+    ).order_by(TrackSimilarity.score.desc(), Track.id.desc()).limit(limit).all()
+
+def recommend_for_user(db: Session, user_id: int, limit: int) -> list:
+    """
+    🎯 Recomendaciones para un usuario: vecinos de sus últimos likes, sumando similitudes
+
+    Se excluyen los tracks que ya le gustan y los suyos propios.
+    """
+    recent_likes = select(Like.track_id).where(Like.user_id == user_id).order_by(
+        Like.created_at.desc(), Like.id.desc()
+    ).limit(settings.RECOMMENDER_USER_LIKES).subquery()
+    already_liked = select(Like.track_id).where(Like.user_id == user_id)
+
+    score = func.sum(TrackSimilarity.score).label("score")
+    candidates = select(TrackSimilarity.similar_track_id.label("track_id"), score).join(
+        recent_likes, recent_likes.c.track_id == TrackSimilarity.track_id
+    ).where(
+        TrackSimilarity.similar_track_id.not_in(already_liked)
+    ).group_by(TrackSimilarity.similar_track_id).subquery()
+
+    return db.query(Track).options(*track_response_options()).join(
+        candidates, candidates.c.track_id == Track.id
+    ).filter(
+        Track.is_public == True,
+        Track.user_id != user_id
+    ).order_by(candidates.c.score.desc(), Track.id.desc()).limit(limit).all()
+
+def remove_similarities(db: Session, track_ids):
+    """🎯 Borrar los vecinos de unos tracks y sus apariciones como vecino (no hace commit)"""
+    db.execute(delete(TrackSimilarity).where(or_(
+        TrackSimilarity.track_id.in_(track_ids),
+        TrackSimilarity.similar_track_id.in_(track_ids)
+    )))
@@ -0,0 +1,245 @@
+import asyncio
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from anyio import to_thread
+from sqlalchemy import and_, delete, or_, select, text
+
+from app import database
+from app.config import settings
+from app.models.notification import Notification
+from app.utils import notification_counts
+from app.utils.cache import TTLCache
+
+# Particiones mensuales creadas por la app: notifications_pAAAA_MM
+PARTITION_NAME = re.compile(r"^notifications_p(\d{4})_(\d{2})$")
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    month = moment.month - 1 + months
+    return moment.replace(year=moment.year + month // 12, month=month % 12 + 1)
+
+
+class NotificationRetention:
+    """
+    Retención de la tabla notifications
+
+    - Las notificaciones leídas se borran pasados `read_ttl_days`.
+    - `max_age_days` es un tope opcional que borra cualquier notificación,
+      también las no leídas (0 = desactivado, por defecto).
+    - La purga borra lotes de `batch_size` filas (una transacción corta por
+      lote) con una pausa entre lotes, así nunca bloquea la tabla mucho tiempo.
+    - En Postgres, si la tabla está particionada por RANGE (created_at), se
+      crean por adelantado las particiones mensuales y las que quedan enteras
+      fuera de `max_age_days` se eliminan con DROP TABLE en lugar de DELETE.
+      La conversión de la tabla a particionada es una migración manual (la
+      clave primaria debe incluir created_at); sin ella se usa el borrado por
+      lotes, igual que en SQLite.
+    """
+
+    def __init__(self, batch_size: int, pause: float, read_ttl_days: int, max_age_days: int,
+                 partitions_ahead: int, stats_ttl: float):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.read_ttl_days = read_ttl_days
+        self.max_age_days = max_age_days
+        self.partitions_ahead = partitions_ahead
+        self.partitioned = False
+        self._lock = threading.Lock()
+        self._totals = {"runs": 0, "deleted": 0, "batches": 0, "partitions_dropped": 0, "seconds": 0.0}
+        self._last_run = None
+        # El tamaño de la tabla (count(*) en SQLite) se cachea entre peticiones
+        self._table_stats = TTLCache(ttl=stats_ttl, maxsize=1)
+
+    # 🧱 PARTICIONES (solo Postgres)
+
+    def _is_partitioned(self, conn) -> bool:
+        return bool(conn.execute(text(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('notifications')"
+        )).scalar())
+
+    def _partitions(self, conn) -> list:
+        rows = conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'notifications'"
+        )).scalars().all()
+        partitions = []
+        for name in rows:
+            match = PARTITION_NAME.match(name)
+            if match:
+                lower = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+                partitions.append((name, lower, _add_months(lower, 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def ensure_partitions(self, conn):
+        """Crea las particiones del mes actual y de los `partitions_ahead` siguientes"""
+        start = _month_start(datetime.now(timezone.utc))
+        for offset in range(self.partitions_ahead + 1):
+            lower = _add_months(start, offset)
+            upper = _add_months(lower, 1)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS notifications_p{lower:%Y_%m} PARTITION OF notifications "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+
+    def setup(self, engine):
+        """Detecta si la tabla está particionada y prepara las particiones (se llama al arrancar)"""
+        self.partitioned = False
+        if engine.dialect.name != "postgresql":
+            return
+        try:
+            with engine.begin() as conn:
+                if self._is_partitioned(conn):
+                    self.ensure_partitions(conn)
+                    self.partitioned = True
+        except Exception as e:
+            print(f"⚠️ No se pudieron preparar las particiones de notifications: {e}")
+
+    def _drop_expired_partitions(self, conn, max_cutoff: datetime) -> int:
+        dropped = 0
+        for name, lower, upper in self._partitions(conn):
+            if upper > max_cutoff:
+                break
+            # Los badges de los usuarios afectados se recalculan en la próxima lectura
+            user_ids = conn.execute(text(f"SELECT DISTINCT user_id FROM {name}")).scalars().all()
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            conn.commit()
+            for user_id in user_ids:
+                notification_counts.invalidate_counts(user_id)
+            dropped += 1
+        return dropped
+
+    # 🧹 PURGA
+
+    def _expired(self, now: datetime):
+        conditions = []
+        if self.read_ttl_days > 0:
+            read_cutoff = now - timedelta(days=self.read_ttl_days)
+            conditions.append(and_(Notification.is_read == True, Notification.created_at < read_cutoff))
+        if self.max_age_days > 0:
+            conditions.append(Notification.created_at < now - timedelta(days=self.max_age_days))
+        return or_(*conditions) if conditions else None
+
+    def purge(self) -> dict:
+        """Borra las notificaciones caducadas por lotes; devuelve las estadísticas de la pasada"""
+        with self._lock:
+            if not database.engine:
+                database.init_engine()
+
+            started = time.perf_counter()
+            now = datetime.now(timezone.utc)
+            deleted = batches = dropped = 0
+            expired = self._expired(now)
+
+            with database.engine.connect() as conn:
+                if self.partitioned:
+                    self.ensure_partitions(conn)
+                    conn.commit()
+                    if self.max_age_days > 0:
+                        dropped = self._drop_expired_partitions(conn, now - timedelta(days=self.max_age_days))
+
+                while expired is not None:
+                    rows = conn.execute(
+                        select(Notification.id, Notification.user_id)
+                        .where(expired)
+                        .order_by(Notification.created_at)
+                        .limit(self.batch_size)
+                    ).all()
+                    if not rows:
+                        break
+                    conn.execute(delete(Notification).where(Notification.id.in_([row.id for row in rows])))
+                    conn.commit()
+                    for user_id in {row.user_id for row in rows}:
+                        notification_counts.invalidate_counts(user_id)
+
+                    deleted += len(rows)
+                    batches += 1
+                    if len(rows) < self.batch_size:
+                        break
+                    # Dejar respirar a las escrituras concurrentes entre lote y lote
+                    time.sleep(self.pause)
+
+            seconds = time.perf_counter() - started
+            self._last_run = {
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "deleted": deleted,
+                "batches": batches,
+                "partitions_dropped": dropped,
+                "seconds": round(seconds, 3),
+                "rows_per_second": round(deleted / seconds, 1) if seconds else 0.0,
+            }
+            self._totals["runs"] += 1
+            self._totals["deleted"] += deleted
+            self._totals["batches"] += batches
+            self._totals["partitions_dropped"] += dropped
+            self._totals["seconds"] += seconds
+            return self._last_run
+
+    async def run(self, interval: float):
+        """Bucle de purga periódica (se lanza desde el lifespan de la app)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await to_thread.run_sync(self.purge)
+            except Exception as e:
+                print(f"❌ Error purgando notificaciones: {e}")
+
+    # 📊 MÉTRICAS
+
+    def table_size(self, conn) -> dict:
+        """Tamaño en disco y filas (estimadas en Postgres) de la tabla notifications"""
+        if conn.dialect.name == "postgresql":
+            row = conn.execute(text(
+                "SELECT sum(pg_total_relation_size(tree.relid)), sum(greatest(c.reltuples, 0)) "
+                "FROM pg_partition_tree('notifications') tree JOIN pg_class c ON c.oid = tree.relid"
+            )).one()
+            return {"bytes": int(row[0] or 0), "rows": int(row[1] or 0)}
+
+        rows = conn.execute(text("SELECT count(*) FROM notifications")).scalar()
+        try:
+            # dbstat solo existe si SQLite se compiló con SQLITE_ENABLE_DBSTAT_VTAB
+            size = conn.execute(text(
+                "SELECT sum(pgsize) FROM dbstat WHERE name = 'notifications' "
+                "OR name IN (SELECT name FROM sqlite_master WHERE tbl_name = 'notifications' AND type = 'index')"
+            )).scalar()
+        except Exception:
+            size = None
+        return {"bytes": size, "rows": rows}
+
+    def metrics(self) -> dict:
+        """Tamaño de la tabla (cacheado) y rendimiento de la purga"""
+        table = self._table_stats.get("notifications")
+        if table is None:
+            if not database.engine:
+                database.init_engine()
+            with database.engine.connect() as conn:
+                table = self.table_size(conn)
+            self._table_stats.set("notifications", table)
+        totals = dict(self._totals)
+        totals["rows_per_second"] = round(totals["deleted"] / totals["seconds"], 1) if totals["seconds"] else 0.0
+        totals["seconds"] = round(totals["seconds"], 3)
+        return {
+            "table": table,
+            "partitioned": self.partitioned,
+            "read_ttl_days": self.read_ttl_days,
+            "max_age_days": self.max_age_days,
+            "batch_size": self.batch_size,
+            "last_run": self._last_run,
+            "totals": totals,
+        }
+
+
+retention = NotificationRetention(
+    batch_size=settings.NOTIFICATION_PURGE_BATCH,
+    pause=settings.NOTIFICATION_PURGE_PAUSE,
+    read_ttl_days=settings.NOTIFICATION_READ_TTL_DAYS,
+    max_age_days=settings.NOTIFICATION_MAX_AGE_DAYS,
+    partitions_ahead=settings.NOTIFICATION_PARTITIONS_AHEAD,
+    stats_ttl=settings.NOTIFICATION_RETENTION_STATS_TTL,
+)
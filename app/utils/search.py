@@ -0,0 +1,144 @@
+import re
+
+from sqlalchemy import column, false, func, literal_column, or_, table, text
+
+from app.models.track import Track
+from app.models.user import User
+
+# Backend de búsqueda activo: "fts5" (SQLite), "postgres" (tsvector + GIN) o
+# "ilike" si el motor no soporta ninguno de los dos
+backend = "ilike"
+
+# Documento de búsqueda de cada tabla: (tabla, columnas indexadas)
+SEARCH_DOCUMENTS = {
+    "tracks": ("title", "description"),
+    "users": ("username", "display_name"),
+}
+
+def _tsvector_sql(table_name: str) -> str:
+    """Expresión tsvector: debe ser idéntica en el índice GIN y en las consultas"""
+    columns = " || ' ' || ".join(
+        f"coalesce({table_name}.{name}, '')" for name in SEARCH_DOCUMENTS[table_name]
+    )
+    return f"to_tsvector('simple', {columns})"
+
+def _setup_sqlite(conn):
+    for table_name, columns in SEARCH_DOCUMENTS.items():
+        fts = f"{table_name}_fts"
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{name}" for name in columns)
+        old_cols = ", ".join(f"old.{name}" for name in columns)
+
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts}
+        ).first()
+
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+            f"USING fts5({cols}, content='{table_name}', content_rowid='id')"
+        ))
+        # Triggers para mantener el índice sincronizado con la tabla
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table_name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+        ))
+
+        if not exists:
+            # Indexar las filas que ya existían antes de crear el índice
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def _setup_postgres(conn):
+    """
+    Índices GIN con CREATE INDEX CONCURRENTLY (conexión en autocommit), como
+    add_missing_indexes: en una tabla grande no bloquean las escrituras.
+    Si una creación anterior se interrumpió, el índice inválido se rehace.
+    """
+    for table_name in SEARCH_DOCUMENTS:
+        index_name = f"ix_{table_name}_search"
+        valid = conn.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": index_name}
+        ).scalar()
+        if valid:
+            continue
+        if valid is False:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+        try:
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY {index_name} "
+                f"ON {table_name} USING GIN (({_tsvector_sql(table_name)}))"
+            ))
+        except Exception:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+            raise
+
+def setup_search(engine):
+    """Crea los índices de texto completo según el motor (se llama al arrancar)"""
+    global backend
+    try:
+        if engine.dialect.name == "sqlite":
+            with engine.begin() as conn:
+                _setup_sqlite(conn)
+            backend = "fts5"
+        elif engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                _setup_postgres(conn)
+            backend = "postgres"
+    except Exception as e:
+        backend = "ilike"
+        print(f"⚠️ Búsqueda de texto completo no disponible, usando ilike: {e}")
+
+def _fts5_query(search: str) -> str:
+    """Convierte el texto del usuario en una consulta FTS5 segura (prefijos, AND)"""
+    terms = re.findall(r"\w+", search)
+    return " ".join(f'"{term}"*' for term in terms)
+
+def _apply_search(query, model, table_name: str, search: str, rank: bool):
+    if backend == "fts5":
+        fts_query = _fts5_query(search)
+        if not fts_query:
+            return query.filter(false())
+        fts = f"{table_name}_fts"
+        fts_table = table(fts, column("rowid"))
+        query = query.join(fts_table, fts_table.c.rowid == model.id).filter(
+            literal_column(fts).op("MATCH")(fts_query)
+        )
+        if rank:
+            # bm25: cuanto menor, más relevante
+            query = query.order_by(func.bm25(literal_column(fts)))
+        return query
+
+    if backend == "postgres":
+        vector = literal_column(_tsvector_sql(table_name))
+        ts_query = func.websearch_to_tsquery("simple", search)
+        query = query.filter(vector.op("@@")(ts_query))
+        if rank:
+            query = query.order_by(func.ts_rank(vector, ts_query).desc())
+        return query
+
+    columns = [getattr(model, name) for name in SEARCH_DOCUMENTS[table_name]]
+    return query.filter(or_(*[col.ilike(f"%{search}%") for col in columns]))
+
+def search_tracks(query, search: str, rank: bool = True):
+    """
+    🎯 Filtrar tracks por título/descripción usando el índice de texto completo
+
+    Con rank=True ordena por relevancia (el orden por fecha queda como desempate).
+    """
+    return _apply_search(query, Track, "tracks", search, rank)
+
+def search_users(query, search: str, rank: bool = True):
+    """
+    🎯 Filtrar usuarios por username/display_name usando el índice de texto completo
+    """
+    return _apply_search(query, User, "users", search, rank)
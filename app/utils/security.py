@@ -1,15 +1,18 @@
-from fastapi import Depends, HTTPException
-from fastapi.security import HTTPBearer
+from fastapi import Depends, Header, HTTPException, Query
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
+from typing import Optional
 import os
 
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
+from app.utils.cache import TTLCache
 import bcrypt
+import hmac
 
 
 
@@ -22,8 +25,8 @@ def create_password_hash(password: str) -> str:
     # Codificar la contraseña a bytes
     password_bytes = password.encode('utf-8')
     
-    # Generar salt y hash
-    salt = bcrypt.gensalt()
+    # Generar salt (con el coste configurado) y hash
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     
     # Devolver como string
@@ -41,6 +44,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Indica si el hash se generó con un coste distinto al configurado"""
+    try:
+        # Formato: $2b$<coste>$<salt+hash>
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
 # 🎫 JWT (se mantiene igual)
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -61,15 +72,115 @@ def verify_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(token: str = Depends(HTTPBearer()), db: Session = Depends(get_db)):
-    payload = verify_token(token.credentials)
-    if payload is None:
+# 👤 CACHÉ DE USUARIOS (LRU + TTL)
+# Solo columnas de perfil: los contadores no se cachean y se leen de la BD
+# únicamente si el handler los usa
+CACHED_USER_COLUMNS = (
+    "id", "username", "email", "display_name", "bio", "avatar_url",
+    "location", "website_url", "created_at", "updated_at"
+)
+user_cache = TTLCache(ttl=settings.USER_CACHE_TTL, maxsize=settings.USER_CACHE_SIZE)
+
+def load_user(db: Session, user_id: int) -> Optional[User]:
+    """Devuelve el User unido a la sesión, desde la caché si es posible (sin SELECT)"""
+    row = user_cache.get(user_id)
+    if row is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            user_cache.set(user_id, {name: getattr(user, name) for name in CACHED_USER_COLUMNS})
+        return user
+
+    user = User(**row)
+    make_transient_to_detached(user)  # el resto de columnas quedan "expiradas"
+    return db.merge(user, load=False)
+
+def invalidate_user(user_id: int):
+    """Descarta un usuario de la caché (al editar o eliminar su perfil)"""
+    user_cache.delete(user_id)
+
+# Claim "scope" de los tokens de un solo uso (p. ej. el del canal push): no
+# sirven como token de acceso en el resto de la API
+STREAM_SCOPE = "stream"
+
+def _user_id_from_payload(payload: Optional[dict], scope: Optional[str] = None) -> int:
+    if payload is None or payload.get("scope") != scope:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
-    
-    user_id = int(payload.get("sub"))
-    user = db.query(User).filter(User.id == user_id).first()
+    try:
+        return int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Token inválido o expirado")
+
+def _user_id_from_token(token) -> int:
+    return _user_id_from_payload(verify_token(token.credentials))
+
+def create_stream_token(user_id: int) -> str:
+    """Token de corta duración que solo abre el canal push (va en la URL del EventSource)"""
+    return create_access_token(
+        data={"sub": str(user_id), "scope": STREAM_SCOPE},
+        expires_delta=timedelta(seconds=settings.STREAM_TOKEN_TTL_SECONDS)
+    )
+
+def get_stream_user_id(
+    token: Optional[str] = Query(None, description="Token de POST /notifications/stream-token"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> int:
+    """
+    Dependencia del canal push: JWT de acceso en la cabecera Authorization o,
+    para EventSource (que no permite cabeceras), un token de create_stream_token
+    en la URL. El JWT de acceso no se admite en la URL.
+    """
+    if credentials:
+        return _user_id_from_token(credentials)
+    return _user_id_from_payload(verify_token(token or ""), scope=STREAM_SCOPE)
+
+def get_current_user(token: str = Depends(HTTPBearer()), db: Session = Depends(get_db)):
+    user_id = _user_id_from_token(token)
+    user = load_user(db, user_id)
     
     if user is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
-    return user
\ No newline at end of file
+    return user
+
+class Principal:
+    """Usuario autenticado según las claims del JWT; el User completo se carga solo si se usa"""
+
+    def __init__(self, user_id: int, db: Session):
+        self.id = user_id
+        self._db = db
+        self._user = None
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            self._user = load_user(self._db, self.id)
+            if self._user is None:
+                raise HTTPException(status_code=404, detail="Usuario no encontrado")
+        return self._user
+
+def get_current_principal(token: str = Depends(HTTPBearer()), db: Session = Depends(get_db)) -> Principal:
+    """Dependencia ligera: confía en el token verificado y no consulta la BD"""
+    return Principal(_user_id_from_token(token), db)
+
+def get_current_writer(token: str = Depends(HTTPBearer()), db: Session = Depends(get_db)) -> Principal:
+    """
+    Dependencia para escrituras: comprueba en la BD (sin caché) que el usuario existe
+
+    El token de un usuario eliminado sigue siendo válido hasta que caduca y la
+    caché es por proceso, así que antes de crear filas a su nombre se consulta
+    la tabla. La lectura abre la transacción de la sesión en la que el handler
+    escribe; en Postgres FOR SHARE bloquea un borrado concurrente hasta el commit.
+    """
+    user_id = _user_id_from_token(token)
+    exists = db.query(User.id).filter(User.id == user_id).with_for_update(read=True).first()
+    if exists is None:
+        invalidate_user(user_id)
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return Principal(user_id, db)
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """Protege los endpoints de métricas internas con settings.METRICS_TOKEN"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=403, detail="Métricas deshabilitadas (configura METRICS_TOKEN)")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de métricas no válido")
@@ -0,0 +1,73 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.models.follower import Follower
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+# user_id -> (límite con el que se calculó, ids sugeridos en orden)
+suggestions_cache = TTLCache(ttl=settings.SUGGESTIONS_CACHE_TTL)
+
+def compute_suggestions(db: Session, user_id: int, limit: int) -> list:
+    """
+    🎯 Calcular ids sugeridos: amigos de amigos primero, luego los más populares
+
+    Los amigos de amigos salen de una sola consulta agrupada (cuántos de mis
+    seguidos les siguen); el resto se completa con el ranking de follower_count.
+    """
+    already_following = db.query(Follower.following_id).filter(Follower.follower_id == user_id)
+    mine = aliased(Follower)
+    theirs = aliased(Follower)
+    mutuals = func.count(theirs.follower_id)
+
+    friends_of_friends = db.query(User.id).select_from(mine).join(
+        theirs, theirs.follower_id == mine.following_id
+    ).join(
+        User, User.id == theirs.following_id
+    ).filter(
+        mine.follower_id == user_id,
+        User.id != user_id,
+        ~User.id.in_(already_following)
+    ).group_by(
+        User.id, User.follower_count
+    ).order_by(
+        mutuals.desc(), User.follower_count.desc(), User.id
+    ).limit(limit).all()
+
+    suggested_ids = [row.id for row in friends_of_friends]
+
+    if len(suggested_ids) < limit:
+        popular = db.query(User.id).filter(
+            User.id != user_id,
+            ~User.id.in_(already_following),
+            ~User.id.in_(suggested_ids)
+        ).order_by(
+            User.follower_count.desc(), User.id
+        ).limit(limit - len(suggested_ids)).all()
+        suggested_ids += [row.id for row in popular]
+
+    return suggested_ids
+
+def get_suggestions(db: Session, user_id: int, limit: int) -> list:
+    """
+    🎯 Usuarios sugeridos para seguir (cacheados por usuario con TTL)
+    """
+    cached = suggestions_cache.get(user_id)
+    if cached and cached[0] >= limit:
+        suggested_ids = cached[1][:limit]
+    else:
+        suggested_ids = compute_suggestions(db, user_id, limit)
+        suggestions_cache.set(user_id, (limit, suggested_ids))
+
+    if not suggested_ids:
+        return []
+
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(suggested_ids)).all()}
+    return [users[user_id] for user_id in suggested_ids if user_id in users]
+
+def invalidate_suggestions(user_id: int):
+    """
+    🎯 Descartar las sugerencias cacheadas de un usuario (al seguir/dejar de seguir)
+    """
+    suggestions_cache.delete(user_id)
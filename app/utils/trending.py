@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from anyio import to_thread
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.track import Track
+from app.schemas.track import TrackResponse
+from app.utils.cache import TTLCache
+from app.utils.loaders import track_response_options
+from app.utils.genres import normalize_genre
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite devuelve fechas sin zona horaria: se guardan siempre en UTC
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class TrendingEngine:
+    """
+    Tracks en tendencia con puntuación que decae en el tiempo
+
+    Cada evento (reproducción, like, comentario) suma su peso a la puntuación
+    del track; la puntuación se reduce a la mitad cada `half_life_hours`, como
+    la "gravedad" de Hacker News/Reddit pero actualizable de forma incremental:
+    en la fila se guarda el valor y el momento en que se calculó, y al sumar
+    un evento primero se lleva el valor al instante actual.
+
+    Los eventos se acumulan en memoria y se vuelcan en lote (como PlayCounter).
+    Cada `refresh_interval` se recalcula el top N global y por género con los
+    tracks que han tenido actividad en los últimos `window_days`; las lecturas
+    de GET /tracks/trending solo consultan esa instantánea.
+    """
+
+    def __init__(self, half_life_hours: float, top_n: int, refresh_interval: float, window_days: int):
+        self.half_life = timedelta(hours=half_life_hours)
+        self.top_n = top_n
+        self.refresh_interval = refresh_interval
+        self.window = timedelta(days=window_days)
+        self._pending = defaultdict(float)
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # scope ("" = global, o el género normalizado) -> [track_id, ...] ordenados
+        self._snapshot = {}
+        self._refreshed_at = None
+        # Sube con cada instantánea nueva: las respuestas cacheadas la llevan en la clave
+        self.version = 0
+
+    def decay(self, score: float, since: datetime, now: datetime) -> float:
+        """Valor en `now` de una puntuación calculada en `since`"""
+        if not score or since is None:
+            return score or 0.0
+        elapsed = (now - _as_utc(since)) / self.half_life
+        return score * 0.5 ** max(elapsed, 0)
+
+    def record(self, track_id: int, weight: float):
+        """Registra un evento de un track (peso negativo para deshacerlo, p. ej. quitar un like)"""
+        with self._pending_lock:
+            self._pending[track_id] += weight
+
+    def flush(self) -> int:
+        """Vuelca los eventos pendientes; devuelve cuántos tracks se actualizaron"""
+        with self._flush_lock:
+            with self._pending_lock:
+                drained = dict(self._pending)
+                self._pending.clear()
+            if not drained:
+                return 0
+
+            if not database.engine:
+                database.init_engine()
+
+            now = datetime.now(timezone.utc)
+            stmt = (
+                update(Track)
+                .where(Track.id == bindparam("track_id"))
+                .values(
+                    trending_score=bindparam("score"),
+                    trending_updated_at=bindparam("scored_at"),
+                    # No es una edición del track: no tocar updated_at (onupdate)
+                    updated_at=Track.updated_at
+                )
+            )
+            try:
+                with database.engine.begin() as conn:
+                    # FOR UPDATE (Postgres): varios workers no se pisan la lectura-escritura
+                    rows = conn.execute(
+                        select(Track.id, Track.trending_score, Track.trending_updated_at)
+                        .where(Track.id.in_(list(drained)))
+                        .with_for_update()
+                    ).all()
+                    params = [
+                        {
+                            "track_id": row.id,
+                            "score": max(self.decay(row.trending_score, row.trending_updated_at, now) + drained[row.id], 0.0),
+                            "scored_at": now,
+                        }
+                        for row in rows
+                    ]
+                    if params:
+                        conn.execute(stmt, params)
+            except Exception:
+                # No perder los eventos: se reintentan en el próximo volcado
+                with self._pending_lock:
+                    for track_id, weight in drained.items():
+                        self._pending[track_id] += weight
+                raise
+            return len(params)
+
+    def refresh(self) -> dict:
+        """Recalcula el top N global y por género a partir de las puntuaciones guardadas"""
+        with self._refresh_lock:
+            if not database.engine:
+                database.init_engine()
+
+            now = datetime.now(timezone.utc)
+            with database.engine.connect() as conn:
+                rows = conn.execute(
+                    select(Track.id, Track.genre, Track.trending_score, Track.trending_updated_at)
+                    .where(
+                        Track.is_public == True,
+                        Track.trending_score > 0,
+                        Track.trending_updated_at >= now - self.window
+                    )
+                ).all()
+
+            scored = sorted(
+                ((self.decay(row.trending_score, row.trending_updated_at, now), row.id, normalize_genre(row.genre) or "")
+                 for row in rows),
+                key=lambda item: (-item[0], -item[1])
+            )
+            snapshot = defaultdict(list)
+            for score, track_id, genre in scored:
+                if len(snapshot[""]) < self.top_n:
+                    snapshot[""].append(track_id)
+                if genre and len(snapshot[genre]) < self.top_n:
+                    snapshot[genre].append(track_id)
+
+            self._snapshot = dict(snapshot)
+            self._refreshed_at = time.monotonic()
+            self.version += 1
+            return self._snapshot
+
+    def top(self, genre: str = None) -> list:
+        """
+        Ids del top N (global o de un género) según la última instantánea
+
+        Solo se calcula aquí si ningún worker lo ha hecho aún (scripts, tests,
+        recién arrancado). Si no, se sirve la última instantánea aunque tenga
+        algo más de `refresh_interval`: recalcular es trabajo del worker.
+        """
+        if self._refreshed_at is None:
+            try:
+                self.flush()
+            except Exception as e:
+                # Los eventos se reintentan en el próximo volcado; el top sale igual
+                print(f"⚠️ No se pudieron volcar las tendencias: {e}")
+            self.refresh()
+        return self._snapshot.get(normalize_genre(genre) or "", [])
+
+    async def run(self):
+        """Bucle de volcado y recálculo del top (se lanza desde el lifespan de la app)"""
+        while True:
+            try:
+                await to_thread.run_sync(self.flush)
+                await to_thread.run_sync(self.refresh)
+            except Exception as e:
+                print(f"❌ Error actualizando tendencias: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+trending = TrendingEngine(
+    half_life_hours=settings.TRENDING_HALF_LIFE_HOURS,
+    top_n=settings.TRENDING_TOP_N,
+    refresh_interval=settings.TRENDING_REFRESH_INTERVAL,
+    window_days=settings.TRENDING_WINDOW_DAYS,
+)
+
+# Respuestas ya serializadas del top de cada ámbito (global o género) y versión
+# de la instantánea: una instantánea nueva no reutiliza las respuestas de la
+# anterior. El TTL deja margen sobre el periodo del worker (intervalo + recálculo)
+trending_cache = TTLCache(ttl=settings.TRENDING_REFRESH_INTERVAL * 2)
+
+def get_trending(db: Session, genre: str = None, limit: int = 50) -> list:
+    """
+    🎯 Tracks en tendencia (global o de un género), servidos desde caché
+    """
+    scope = normalize_genre(genre) or ""
+    track_ids = trending.top(scope)
+    key = (scope, trending.version)
+    tracks = trending_cache.get(key)
+    if tracks is None:
+        rows = db.query(Track).options(*track_response_options()).filter(
+            Track.id.in_(track_ids), Track.is_public == True
+        ).all() if track_ids else []
+        by_id = {track.id: track for track in rows}
+        tracks = [TrackResponse.model_validate(by_id[track_id]) for track_id in track_ids if track_id in by_id]
+        trending_cache.set(key, tracks)
+    return tracks[:limit]
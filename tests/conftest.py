@@ -0,0 +1,60 @@
+import os
+
+# Configuración antes de importar la app (settings se lee al importar)
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import database
+from app.main import app
+from app.utils.comment_timeline import timeline_cache
+from app.utils.fanout import recent_pulls
+from app.utils.security import user_cache
+from tests.utils import QueryCounter
+
+
+@pytest.fixture
+def engine():
+    """SQLite en memoria compartida entre hilos (los handlers corren en el threadpool)"""
+    test_engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    database.engine = test_engine
+    database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    database.create_tables()
+    user_cache.clear()
+    recent_pulls.clear()
+    timeline_cache.clear()
+    yield test_engine
+    database.engine = None
+    database.SessionLocal = None
+    test_engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = database.SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(engine):
+    # Sin lifespan: los workers en segundo plano no deben ejecutar consultas
+    # mientras se cuentan las de una petición
+    return TestClient(app)
+
+
+@pytest.fixture
+def count_queries(engine):
+    """Uso: `with count_queries() as queries: ...; queries.count`"""
+    return QueryCounter(engine)
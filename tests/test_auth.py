@@ -0,0 +1,52 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models.comment import Comment
+from app.models.track import Track
+from app.utils.security import create_access_token, get_stream_user_id
+from tests.utils import auth_headers, make_users
+
+
+def test_deleted_user_token_cannot_create_rows(client, db):
+    user, = make_users(db, 1)
+    headers = auth_headers(user.id)
+    assert client.get("/tracks/", headers=headers).status_code == 200
+
+    db.delete(user)
+    db.commit()
+
+    response = client.post("/tracks/", headers=headers, json={"title": "t", "audio_url": "http://x/a.mp3"})
+    assert response.status_code == 404
+    assert db.query(Track).count() == 0
+
+
+def test_write_succeeds_for_existing_user(client, db):
+    artist, fan = make_users(db, 2)
+
+    response = client.post("/tracks/", headers=auth_headers(artist.id), json={"title": "t", "audio_url": "http://x/a.mp3"})
+    assert response.status_code == 201, response.text
+
+    response = client.post("/comments/", headers=auth_headers(fan.id), json={"content": "hola", "track_id": response.json()["id"]})
+    assert response.status_code == 200, response.text
+    assert db.query(Comment).count() == 1
+
+
+def test_token_without_subject_is_unauthorized(client):
+    headers = {"Authorization": f"Bearer {create_access_token({'role': 'x'})}"}
+    assert client.get("/notifications/stats", headers=headers).status_code == 401
+
+
+def test_stream_token_only_opens_the_stream(client, db):
+    user, = make_users(db, 1)
+    response = client.post("/notifications/stream-token", headers=auth_headers(user.id))
+    assert response.status_code == 200
+    stream_token = response.json()["token"]
+
+    assert get_stream_user_id(token=stream_token, credentials=None) == user.id
+    # Ni el JWT de acceso en la URL ni el token del stream como JWT de acceso
+    access_token = auth_headers(user.id)["Authorization"].split()[1]
+    with pytest.raises(HTTPException) as error:
+        get_stream_user_id(token=access_token, credentials=None)
+    assert error.value.status_code == 401
+    headers = {"Authorization": f"Bearer {stream_token}"}
+    assert client.get("/notifications/stats", headers=headers).status_code == 401
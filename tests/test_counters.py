@@ -0,0 +1,72 @@
+from app import database
+from app.models.follower import Follower
+from app.models.like import Like
+from app.models.track import Track
+from app.models.user import User
+from app.utils.counters import bump_user, reconcile_counters
+from tests.utils import auth_headers, count_statements, make_users
+
+
+def test_added_follower_count_column_is_backfilled(engine, db):
+    artist, fan_a, fan_b = make_users(db, 3)
+    db.add_all([
+        Follower(follower_id=fan_a.id, following_id=artist.id),
+        Follower(follower_id=fan_b.id, following_id=artist.id),
+    ])
+    db.commit()
+
+    # Base de datos anterior a la columna
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_users_follower_count")
+        conn.exec_driver_sql("ALTER TABLE users DROP COLUMN follower_count")
+    database.add_missing_columns()
+
+    db.expire_all()
+    counts = {user.id: user.follower_count for user in db.query(User)}
+    assert counts == {artist.id: 2, fan_a.id: 0, fan_b.id: 0}
+
+
+def test_counter_decrement_does_not_go_negative(db):
+    user, = make_users(db, 1)
+
+    bump_user(db, user.id, follower_count=-1)
+    db.commit()
+
+    db.refresh(user)
+    assert user.follower_count == 0
+
+
+def test_reconcile_recomputes_counters_in_batches(db):
+    users = make_users(db, 5)
+    db.add_all([Follower(follower_id=fan.id, following_id=users[0].id) for fan in users[1:]])
+    db.commit()
+
+    reconcile_counters(db, batch_size=2)
+
+    db.expire_all()
+    assert db.get(User, users[0].id).follower_count == 4
+    assert [db.get(User, fan.id).following_count for fan in users[1:]] == [1, 1, 1, 1]
+
+
+def test_user_stats_report_likes_and_plays_separately(client, db):
+    artist, fan = make_users(db, 2)
+    track = Track(title="t", audio_url="http://x/a.mp3", user_id=artist.id, is_public=True, play_count=7)
+    db.add(track)
+    db.commit()
+    db.add(Like(user_id=fan.id, track_id=track.id))
+    db.commit()
+    reconcile_counters(db)
+
+    stats = client.get(f"/users/{artist.id}/stats").json()
+    assert stats["total_likes"] == 1
+    assert stats["total_plays"] == 7
+
+
+def test_my_follow_stats_read_counters_in_one_statement(client, count_queries, db):
+    artist, *fans = make_users(db, 3)
+    for fan in fans:
+        client.post(f"/follow/{artist.id}", headers=auth_headers(fan.id))
+
+    count, stats = count_statements(client, count_queries, "/follow/me/stats", auth_headers(artist.id))
+    assert (stats["follower_count"], stats["following_count"]) == (2, 0)
+    assert count == 1
@@ -0,0 +1,58 @@
+import pytest
+
+from app.models.track import Track
+from app.utils.discovery import apply_discovery_filters, bpm_ranges, order_by_tempo
+from app.utils.genres import normalize_existing_genres
+from tests.utils import make_users
+
+
+@pytest.fixture
+def catalog(db):
+    """Catálogo con 40 géneros y BPM repartidos, con estadísticas del planificador (ANALYZE)"""
+    artist, = make_users(db, 1)
+    db.add_all([
+        Track(user_id=artist.id, title=f"T{i}", audio_url=f"https://cdn/{i}.mp3",
+              genre=f"genre {i % 40}", bpm=60 + i % 120, is_public=i % 10 != 0)
+        for i in range(4000)
+    ])
+    db.commit()
+    db.connection().exec_driver_sql("ANALYZE")
+    return db
+
+
+def _plan(db, genres, ranges) -> list:
+    query = order_by_tempo(apply_discovery_filters(db.query(Track), genres, ranges), 124)
+    sql = str(query.statement.compile(db.bind, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+@pytest.mark.parametrize("genres, ranges, index", [
+    (["genre 1"], bpm_ranges(124, 6), "ix_tracks_genre_bpm"),
+    (["genre 1", "genre 2"], bpm_ranges(124, 6, half_double=True), "ix_tracks_genre_bpm"),
+    ([], bpm_ranges(None, 0, bpm_min=120, bpm_max=130), "ix_tracks_public_bpm"),
+    ([], bpm_ranges(124, 6, half_double=True), "ix_tracks_public_bpm"),
+])
+def test_discovery_query_uses_index(catalog, genres, ranges, index):
+    searches = [step for step in _plan(catalog, genres, ranges) if "tracks" in step]
+    assert searches, searches
+    assert all(step.startswith("SEARCH") and f"INDEX {index} " in step and "bpm>" in step for step in searches)
+
+
+def test_normalize_existing_genres_only_writes_when_needed(engine, db, count_queries):
+    artist, = make_users(db, 1)
+    db.add(Track(user_id=artist.id, title="T", audio_url="https://cdn/t.mp3", genre="  Deep House "))
+    db.commit()
+
+    assert normalize_existing_genres(engine) == 1
+    with count_queries() as queries:
+        assert normalize_existing_genres(engine) == 0
+    assert not any(statement.startswith("UPDATE") for statement in queries.statements)
+
+
+def test_fractional_bpm_range_contains_nearest_integer(client, catalog):
+    assert bpm_ranges(120.5, 0) == [(120, 120)]
+    assert bpm_ranges(121.7, 0.1, half_double=True) == [(61, 61), (122, 122), (243, 243)]
+
+    # 121 es el entero más cercano (en el catálogo, los tracks a 120 son privados)
+    tracks = client.get("/tracks/discover?bpm=121.4&tolerance=0").json()
+    assert tracks and {track["bpm"] for track in tracks} == {121}
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.models.follower import Follower
+from app.models.notification import Notification
+from app.models.track import Track
+from app.utils import fanout as fanout_module
+from app.utils.fanout import insert_new_tracks
+from app.utils.notification_groups import add_notification
+from tests.utils import PAGE_SIZES, auth_headers, count_statements, make_users
+
+
+@pytest.fixture
+def inbox(db):
+    """Un destinatario con 60 notificaciones de remitentes distintos (algunas agrupadas)"""
+    recipient, *senders = make_users(db, 61)
+    types = ("follow", "like", "comment", "track_comment")
+    notifications = []
+    for i, sender in enumerate(senders):
+        grouped = i % 3 == 0
+        notifications.append(Notification(
+            user_id=recipient.id,
+            from_user_id=sender.id,
+            type=types[i % len(types)],
+            target_id=i,
+            actor_count=3 if grouped else 1,
+            sender_sample=[sender.id, senders[i - 1].id, senders[i - 2].id] if grouped else None,
+        ))
+    db.add_all(notifications)
+    db.commit()
+    return recipient.id, [n.id for n in notifications]
+
+
+def test_notification_page_has_constant_statement_count(client, count_queries, inbox):
+    recipient_id, _ = inbox
+    headers = auth_headers(recipient_id)
+
+    counts = {}
+    for size in PAGE_SIZES:
+        counts[size], page = count_statements(client, count_queries, f"/notifications/?limit={size}", headers)
+        assert len(page) == size
+        assert all(item["sender"] for item in page)
+        assert any(len(item["senders"]) == 3 for item in page)
+
+    assert counts[5] == counts[50]
+
+
+def test_notification_cursor_page_has_constant_statement_count(client, count_queries, inbox):
+    recipient_id, _ = inbox
+    headers = auth_headers(recipient_id)
+
+    counts = {}
+    for size in PAGE_SIZES:
+        counts[size], page = count_statements(client, count_queries, f"/notifications/?cursor_mode=true&limit={size}", headers)
+        assert len(page["items"]) == size
+
+    assert counts[5] == counts[50]
+
+
+def test_mark_notification_read_does_not_reload_senders(client, count_queries, inbox):
+    recipient_id, notification_ids = inbox
+    headers = auth_headers(recipient_id)
+
+    counts = []
+    # Dos notificaciones no agrupadas: misma cantidad de sentencias
+    for notification_id in notification_ids[1:3]:
+        with count_queries() as queries:
+            response = client.put(f"/notifications/{notification_id}/read", headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["is_read"] is True
+        assert response.json()["sender"] is not None
+        counts.append(queries.count)
+
+    assert counts[0] == counts[1]
+
+
+@pytest.fixture
+def big_artist(db, monkeypatch):
+    """Un artista por encima del umbral de fan-out, un seguidor suyo y un track nuevo"""
+    monkeypatch.setattr(settings, "NOTIFICATION_FANOUT_THRESHOLD", 1)
+    artist, fan, loner = make_users(db, 3, prefix="pull")
+    artist.follower_count = 1
+    db.add(Follower(follower_id=fan.id, following_id=artist.id))
+    db.commit()
+    track = Track(user_id=artist.id, title="Nuevo", audio_url="https://cdn/nuevo.mp3", is_public=True)
+    db.add(track)
+    db.commit()
+    return fan.id, loner.id, track.id
+
+
+def test_notifications_read_does_not_write_without_big_artists(client, count_queries, big_artist):
+    _, loner_id, _ = big_artist
+
+    with count_queries() as queries:
+        response = client.get("/notifications/", headers=auth_headers(loner_id))
+    assert response.status_code == 200, response.text
+    assert not any(statement.lstrip().upper().startswith("INSERT") for statement in queries.statements)
+
+
+def test_pulled_new_track_is_not_duplicated(client, db, big_artist):
+    fan_id, _, track_id = big_artist
+
+    for _ in range(2):
+        response = client.get("/notifications/", headers=auth_headers(fan_id))
+        assert response.status_code == 200, response.text
+    assert [item["target_id"] for item in response.json()] == [track_id]
+
+    # Pull y reparto a la vez: la segunda inserción se ignora
+    db.execute(insert_new_tracks(db.bind.dialect.name), [
+        {"user_id": fan_id, "from_user_id": fan_id, "type": "new_track", "target_id": track_id, "is_read": False}
+    ])
+    db.commit()
+    assert db.query(Notification).filter(Notification.user_id == fan_id).count() == 1
+
+
+def test_grouping_keeps_created_at_stable(db, count_queries):
+    recipient_id, first_id, second_id = (user.id for user in make_users(db, 3, prefix="group"))
+    db.add(Follower(follower_id=first_id, following_id=recipient_id))
+    group, _ = add_notification(db, recipient_id, first_id, "follow", first_id)
+    db.commit()
+    created_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    db.query(Notification).filter(Notification.id == group.id).update(
+        {Notification.created_at: created_at, Notification.last_activity_at: created_at}
+    )
+    db.add(Follower(follower_id=second_id, following_id=recipient_id))
+    db.commit()
+
+    with count_queries() as queries:
+        bumped, created = add_notification(db, recipient_id, second_id, "follow", second_id)
+        assert (bumped.actor_count, bumped.from_user_id) == (2, second_id)
+        assert bumped.last_activity_at > bumped.created_at
+    db.commit()
+
+    assert (bumped.id, created) == (group.id, False)
+    # Buscar el grupo y un UPDATE ... RETURNING, sin recargarlo
+    assert queries.count == 2
+    db.expire_all()
+    assert bumped.created_at.replace(tzinfo=None) == created_at.replace(tzinfo=None)
+
+
+def test_refollow_does_not_inflate_actor_count(client, db):
+    recipient_id, *fan_ids = (user.id for user in make_users(db, 5, prefix="refollow"))
+    for fan_id in fan_ids:
+        assert client.post(f"/follow/{recipient_id}", headers=auth_headers(fan_id)).status_code == 200
+
+    # El primero ya no está en la muestra (3 remitentes): deja de seguir y vuelve
+    for _ in range(3):
+        client.post(f"/follow/{recipient_id}", headers=auth_headers(fan_ids[0]))
+        client.post(f"/follow/{recipient_id}", headers=auth_headers(fan_ids[0]))
+
+    db.expire_all()
+    group = db.query(Notification).filter(Notification.user_id == recipient_id).one()
+    assert group.actor_count == len(fan_ids)
+
+
+def test_fanout_only_announces_inserted_notifications(db, monkeypatch):
+    artist, notified, fresh = make_users(db, 3, prefix="fan")
+    artist.follower_count = 2
+    db.add_all([
+        Follower(follower_id=notified.id, following_id=artist.id),
+        Follower(follower_id=fresh.id, following_id=artist.id),
+    ])
+    track = Track(user_id=artist.id, title="Nuevo", audio_url="https://cdn/nuevo.mp3", is_public=True)
+    db.add(track)
+    db.commit()
+    db.add(Notification(user_id=notified.id, from_user_id=artist.id, type="new_track", target_id=track.id))
+    db.commit()
+
+    published = []
+    monkeypatch.setattr(fanout_module, "publish_to_user", lambda user_id, event, data: published.append(user_id))
+    fanout_module.fanout.process(track.id, artist.id)
+
+    assert published == [fresh.id]
+    assert db.query(Notification).filter(Notification.type == "new_track").count() == 2
+
+
+def test_badge_pulls_big_artist_tracks(client, big_artist, monkeypatch):
+    fan_id, _, track_id = big_artist
+    published = []
+    monkeypatch.setattr(fanout_module, "publish_to_user", lambda user_id, event, data: published.append(data))
+
+    response = client.get("/notifications/stats", headers=auth_headers(fan_id))
+    assert response.status_code == 200, response.text
+    assert response.json()["unread_count"] == 1
+    assert [data["target_id"] for data in published] == [track_id]
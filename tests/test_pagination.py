@@ -0,0 +1,35 @@
+from sqlalchemy import update
+
+from app.config import settings
+from app.models.user import User
+from tests.utils import auth_headers, make_users
+
+
+def test_cursor_limit_is_bounded(client, db):
+    user, = make_users(db, 1)
+    headers = auth_headers(user.id)
+
+    response = client.get(f"/tracks/?cursor_mode=true&limit={settings.PAGE_MAX_LIMIT + 1}", headers=headers)
+    assert response.status_code == 422
+
+    response = client.get("/tracks/?cursor_mode=true&limit=0", headers=headers)
+    assert response.status_code == 422
+
+
+def test_cursor_skips_rows_without_sort_key(client, db):
+    users = make_users(db, 4)
+    db.execute(update(User).where(User.id == users[0].id).values(created_at=None))
+    db.commit()
+
+    response = client.get("/users/?cursor_mode=true&limit=2")
+    assert response.status_code == 200
+    page = response.json()
+    response = client.get(f"/users/?limit=2&cursor={page['next_cursor']}")
+    assert response.status_code == 200
+    ids = [user["id"] for user in page["items"] + response.json()["items"]]
+    assert sorted(ids) == sorted(user.id for user in users[1:])
+
+
+def test_discover_limit_uses_page_max_limit(client):
+    assert client.get(f"/tracks/discover?limit={settings.PAGE_MAX_LIMIT}").status_code == 200
+    assert client.get(f"/tracks/discover?limit={settings.PAGE_MAX_LIMIT + 1}").status_code == 422
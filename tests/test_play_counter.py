@@ -0,0 +1,51 @@
+import pytest
+
+from app import database
+from app.models.track import Track
+from app.utils.play_counter import PlayCounter
+from tests.utils import make_users
+
+
+@pytest.fixture
+def track_id(db):
+    artist, = make_users(db, 1)
+    track = Track(user_id=artist.id, title="T", audio_url="https://cdn/t.mp3", is_public=True)
+    db.add(track)
+    db.commit()
+    return track.id
+
+
+def _database_down():
+    raise RuntimeError("BD caída")
+
+
+def test_plays_are_dropped_once_the_shard_is_full(db, track_id):
+    counter = PlayCounter(shards=2, max_pending=2, max_buffered=10)
+
+    accepted = [counter.increment(track_id) for _ in range(8)]
+    assert accepted == [True] * 5 + [False] * 3
+    assert (counter.pending_total(), counter.dropped_total()) == (5, 3)
+
+    assert counter.flush() == 1
+    db.expire_all()
+    assert db.get(Track, track_id).play_count == 5
+    assert counter.pending_total() == 0
+    assert counter.increment(track_id)
+
+
+def test_failed_flush_keeps_the_bound(db, track_id, monkeypatch):
+    counter = PlayCounter(shards=1, max_pending=2, max_buffered=3)
+    for _ in range(3):
+        counter.increment(track_id)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(database.engine, "begin", _database_down)
+        with pytest.raises(RuntimeError):
+            counter.flush()
+
+    # Las que no se pudieron volcar siguen pendientes y ocupan el shard
+    assert counter.pending(track_id) == 3
+    assert not counter.increment(track_id)
+    assert counter.flush() == 1
+    db.expire_all()
+    assert db.get(Track, track_id).play_count == 3
@@ -0,0 +1,48 @@
+import pytest
+
+from app.models.like import Like
+from app.models.track import Track
+from app.models.track_similarity import TrackSimilarity
+from app.utils.recommender import recommender
+from tests.utils import make_users
+
+
+@pytest.fixture
+def likes(db):
+    """Cinco tracks y seis usuarios con gustos solapados; el track 4 no comparte likes"""
+    artist, *fans = make_users(db, 7)
+    tracks = [Track(user_id=artist.id, title=f"T{i}", audio_url=f"https://cdn/{i}.mp3") for i in range(5)]
+    db.add_all(tracks)
+    db.commit()
+    liked = {0: (0, 1, 2), 1: (0, 1), 2: (1, 2, 3), 3: (2, 3), 4: (4,), 5: (0, 3)}
+    db.add_all([
+        Like(user_id=fans[fan].id, track_id=tracks[track].id)
+        for fan, track_indexes in liked.items() for track in track_indexes
+    ])
+    db.commit()
+    return [track.id for track in tracks]
+
+
+def _neighbours(db) -> dict:
+    rows = db.query(TrackSimilarity).order_by(TrackSimilarity.track_id, TrackSimilarity.similar_track_id)
+    return {(row.track_id, row.similar_track_id): round(row.score, 6) for row in rows}
+
+
+def test_incremental_update_matches_rebuild(db, likes, count_queries):
+    stats = recommender.rebuild()
+    rebuilt = _neighbours(db)
+    assert stats["tracks"] == 4
+    assert not any(likes[4] in pair for pair in rebuilt)
+
+    db.query(TrackSimilarity).delete()
+    db.commit()
+    for track_id in likes:
+        recommender.mark_dirty(track_id)
+    with count_queries() as queries:
+        assert recommender.update() == len(likes)
+
+    db.expire_all()
+    assert _neighbours(db) == rebuilt
+    # Los likes por track solo se cuentan para los pendientes y sus vecinos
+    like_counts = [s for s in queries.statements if "count(*)" in s and "GROUP BY likes.track_id" in s]
+    assert like_counts and all("WHERE likes.track_id IN" in s for s in like_counts)
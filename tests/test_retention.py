@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+
+from app.config import settings
+from app.models.notification import Notification
+from app.utils.retention import retention
+from tests.utils import make_users
+
+
+def test_default_purge_keeps_old_unread_notifications(db):
+    recipient, sender = make_users(db, 2)
+    old = datetime.now(timezone.utc) - timedelta(days=400)
+    db.add_all([
+        Notification(user_id=recipient.id, from_user_id=sender.id, type="follow", is_read=True, created_at=old),
+        Notification(user_id=recipient.id, from_user_id=sender.id, type="like", is_read=False, created_at=old),
+    ])
+    db.commit()
+
+    assert retention.max_age_days == 0
+    assert retention.purge()["deleted"] == 1
+    assert [n.type for n in db.query(Notification)] == ["like"]
+
+
+def test_retention_metrics_require_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+
+    assert client.get("/api/notifications-retention").status_code == 403
+    response = client.get("/api/notifications-retention", headers={"X-Metrics-Token": "s3cret"})
+    assert response.status_code == 200, response.text
+    assert response.json()["max_age_days"] == 0
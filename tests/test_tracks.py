@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.models.comment import Comment
+from app.models.track import Track
+from app.utils import comment_timeline
+from tests.utils import PAGE_SIZES, auth_headers, count_statements, make_users
+
+
+@pytest.fixture
+def catalog(db):
+    """60 tracks recientes de 60 artistas distintos y 60 más antiguos del primero"""
+    listener, *artists = make_users(db, 61)
+    older = datetime.now(timezone.utc) - timedelta(days=1)
+    tracks = [
+        Track(user_id=artist.id, title=f"Track {i}", audio_url=f"https://cdn/{i}.mp3", is_public=True)
+        for i, artist in enumerate(artists)
+    ]
+    tracks += [
+        Track(user_id=artists[0].id, title=f"Propio {i}", audio_url=f"https://cdn/p{i}.mp3", is_public=True,
+              created_at=older)
+        for i in range(60)
+    ]
+    db.add_all(tracks)
+    db.commit()
+    return listener.id, artists[0].id
+
+
+@pytest.mark.parametrize("url", ["/tracks/?limit={size}", "/tracks/?cursor_mode=true&limit={size}"])
+def test_track_page_has_constant_statement_count(client, count_queries, catalog, url):
+    listener_id, _ = catalog
+    headers = auth_headers(listener_id)
+
+    counts = {}
+    for size in PAGE_SIZES:
+        counts[size], page = count_statements(client, count_queries, url.format(size=size), headers)
+        items = page["items"] if isinstance(page, dict) else page
+        assert len(items) == size
+        assert len({item["artist"]["id"] for item in items}) == size
+
+    assert counts[5] == counts[50]
+
+
+def test_user_tracks_page_has_constant_statement_count(client, count_queries, catalog):
+    listener_id, artist_id = catalog
+    headers = auth_headers(listener_id)
+
+    counts = {}
+    for size in PAGE_SIZES:
+        counts[size], page = count_statements(client, count_queries, f"/users/{artist_id}/tracks?limit={size}", headers)
+        assert len(page) == size
+        assert all(item["artist"]["id"] == artist_id for item in page)
+
+    assert counts[5] == counts[50]
+
+
+def test_timeline_cache_ignores_stale_histograms(db, monkeypatch):
+    artist, = make_users(db, 1)
+    track = Track(user_id=artist.id, title="t", audio_url="https://cdn/t.mp3", is_public=True)
+    db.add(track)
+    db.commit()
+    compute = comment_timeline.compute_histogram
+
+    def invalidated_while_computing(db, track_id, bucket_seconds):
+        histogram = compute(db, track_id, bucket_seconds)
+        db.add(Comment(track_id=track_id, user_id=artist.id, content="drop", timestamp_seconds=30))
+        db.commit()
+        comment_timeline.invalidate_timeline(track_id)
+        return histogram
+
+    monkeypatch.setattr(comment_timeline, "compute_histogram", invalidated_while_computing)
+    assert comment_timeline.get_histogram(db, track.id, settings.COMMENT_TIMELINE_BUCKET) == []
+    monkeypatch.setattr(comment_timeline, "compute_histogram", compute)
+    # El histograma calculado antes de invalidar no quedó en caché
+    assert comment_timeline.get_histogram(db, track.id, settings.COMMENT_TIMELINE_BUCKET) == [
+        {"start": 30, "end": 30 + settings.COMMENT_TIMELINE_BUCKET, "count": 1}
+    ]
+
+    # Otros tamaños de tramo no se cachean
+    comment_timeline.get_histogram(db, track.id, 7)
+    generation, histogram = comment_timeline.timeline_cache.get(track.id)
+    assert len(comment_timeline.timeline_cache) == 1 and histogram[0]["count"] == 1
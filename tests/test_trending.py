@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from app.models.track import Track
+from app.utils.trending import trending
+from tests.utils import auth_headers, make_users
+
+
+@pytest.fixture
+def fresh_trending(monkeypatch):
+    """Motor sin instantánea previa (como recién arrancado)"""
+    monkeypatch.setattr(trending, "_refreshed_at", None)
+    monkeypatch.setattr(trending, "_snapshot", {})
+    return trending
+
+
+def _failing_flush():
+    raise RuntimeError("base de datos caída")
+
+
+def test_stale_snapshot_is_served_without_recomputing(db, fresh_trending, monkeypatch):
+    artist, = make_users(db, 1)
+    track = Track(user_id=artist.id, title="Hit", audio_url="https://cdn/hit.mp3", is_public=True)
+    db.add(track)
+    db.commit()
+    fresh_trending.record(track.id, 5)
+    assert fresh_trending.top() == [track.id]
+
+    # Instantánea caducada: las peticiones no recalculan (ni fallan si el volcado falla)
+    fresh_trending._refreshed_at = time.monotonic() - fresh_trending.refresh_interval * 10
+    monkeypatch.setattr(fresh_trending, "flush", _failing_flush)
+    monkeypatch.setattr(fresh_trending, "refresh", _failing_flush)
+    assert fresh_trending.top() == [track.id]
+
+
+def test_first_request_survives_a_failed_flush(client, db, fresh_trending, monkeypatch):
+    user, = make_users(db, 1)
+    monkeypatch.setattr(fresh_trending, "flush", _failing_flush)
+
+    response = client.get("/tracks/trending", headers=auth_headers(user.id))
+    assert response.status_code == 200, response.text
+    assert response.json() == []
@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.models.user import User
+from app.utils.security import create_access_token
+
+
+# Tamaños de página con los que se comprueba que un listado no hace N+1
+PAGE_SIZES = (5, 50)
+
+
+class QueryCounter:
+    """Cuenta las sentencias SQL que llegan al motor (before_cursor_execute)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @contextmanager
+    def __call__(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        try:
+            yield self
+        finally:
+            event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+def count_statements(client, count_queries, url: str, headers: dict) -> tuple:
+    """GET `url` y devuelve (sentencias SQL ejecutadas, JSON de la respuesta)"""
+    with count_queries() as queries:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return queries.count, response.json()
+
+
+def make_users(db, n: int, prefix: str = "user") -> list:
+    users = [
+        User(username=f"{prefix}{i}", email=f"{prefix}{i}@test.com", password_hash="x", display_name=f"{prefix} {i}")
+        for i in range(n)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def auth_headers(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}